@@ -4,6 +4,7 @@ import sqlite3
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk
+from thumbnails import ThumbnailCache
 import cv2
 from datetime import datetime
 from ultralytics import YOLO
@@ -71,14 +72,15 @@ tree.pack()
 
 
 # ========== HIỂN THỊ ẢNH ==========
+thumbs = ThumbnailCache()
+
 def show_zoom_image(path):
     if not path or not os.path.exists(path):
         label_zoom.config(image="", text="Không có ảnh zoom")
         return
 
-    img = Image.open(path)
-    img.thumbnail((400, 350))
-    tk_img = ImageTk.PhotoImage(img)
+    # Cached thumbnail (draft-mode decode), not a full-size decode per click
+    tk_img = thumbs.get(path, (400, 350))
 
     label_zoom.config(image=tk_img)
     label_zoom.image = tk_img
@@ -89,9 +91,7 @@ def show_face_image(path):
         label_face.config(image="", text="Không có ảnh mặt")
         return
 
-    img = Image.open(path)
-    img.thumbnail((280, 280))
-    tk_img = ImageTk.PhotoImage(img)
+    tk_img = thumbs.get(path, (280, 280))
 
     label_face.config(image=tk_img)
     label_face.image = tk_img
@@ -119,6 +119,14 @@ def view_selected(event=None):
     show_zoom_image(zoom_path)
     # hiển thị khuôn mặt
     show_face_image(face_path)
+    # Warm the cache for the rows above and below
+    for iid in (tree.next(selected[0]), tree.prev(selected[0])):
+        if not iid:
+            continue
+        cur.execute("SELECT zoom_path, face_path FROM images WHERE name=?", (tree.item(iid)["values"][0],))
+        near = cur.fetchone()
+        if near:
+            thumbs.prefetch([(near[0], (400, 350)), (near[1], (280, 280))])
 
 
 tree.bind("<<TreeviewSelect>>", view_selected)
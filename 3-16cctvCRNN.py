@@ -4,6 +4,7 @@ import sqlite3
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk
+from thumbnails import ThumbnailCache
 import cv2
 from datetime import datetime
 from ultralytics import YOLO
@@ -118,13 +119,14 @@ def load_images():
 # ==============================
 # Show Images
 # ==============================
+thumbs = ThumbnailCache()
+
 def show_zoom_image(path):
     if not path or not os.path.exists(path):
         label_zoom.config(image="", text="Không có ảnh zoom", fg="white")
         return
-    img = Image.open(path)
-    img.thumbnail((500, 450))
-    tk_img = ImageTk.PhotoImage(img)
+    # Cached thumbnail (draft-mode decode), not a full-size decode per click
+    tk_img = thumbs.get(path, (500, 450))
     label_zoom.config(image=tk_img)
     label_zoom.image = tk_img
 
@@ -132,9 +134,7 @@ def show_face_image(path):
     if not path or not os.path.exists(path):
         label_face.config(image="", text="Không có ảnh mặt", fg="white")
         return
-    img = Image.open(path)
-    img.thumbnail((300, 300))
-    tk_img = ImageTk.PhotoImage(img)
+    tk_img = thumbs.get(path, (300, 300))
     label_face.config(image=tk_img)
     label_face.image = tk_img
 
@@ -154,6 +154,14 @@ def view_selected(event=None):
     img_path, zoom_path, face_path = row
     show_zoom_image(zoom_path)
     show_face_image(face_path)
+    # Warm the cache for the rows above and below
+    for iid in (tree.next(selected[0]), tree.prev(selected[0])):
+        if not iid:
+            continue
+        cur.execute("SELECT zoom_path, face_path FROM images WHERE name=?", (tree.item(iid)["values"][0],))
+        near = cur.fetchone()
+        if near:
+            thumbs.prefetch([(near[0], (500, 450)), (near[1], (300, 300))])
 
 tree.bind("<<TreeviewSelect>>", view_selected)
 tree.bind("<Double-1>", view_selected)
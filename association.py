@@ -0,0 +1,65 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+# ---------------------------
+# Plate <-> vehicle association (vectorized, one-to-one)
+# ---------------------------
+MIN_CONTAINMENT = 0.5   # share of the plate area that must lie inside the car box
+MIN_IOU = 0.1
+
+def _as_boxes(boxes):
+    a = np.asarray(boxes, dtype=np.float32).reshape(-1, 4) if len(boxes) else np.zeros((0, 4), np.float32)
+    return a[:, :4]
+
+def iou_matrix(a, b):
+    """IoU of every box in a (N,4) against every box in b (M,4) -> (N, M)."""
+    a, b = _as_boxes(a), _as_boxes(b)
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+def containment_matrix(plates, cars):
+    """Share of each plate's area inside each car box, (P, T), slightly favouring cars
+    whose horizontal centre is close to the plate (the car behind also contains it)."""
+    p, c = _as_boxes(plates), _as_boxes(cars)
+    ix1 = np.maximum(p[:, None, 0], c[None, :, 0])
+    iy1 = np.maximum(p[:, None, 1], c[None, :, 1])
+    ix2 = np.minimum(p[:, None, 2], c[None, :, 2])
+    iy2 = np.minimum(p[:, None, 3], c[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_p = np.maximum((p[:, 2] - p[:, 0]) * (p[:, 3] - p[:, 1]), 1e-9)
+    contain = inter / area_p[:, None]
+
+    pcx = (p[:, 0] + p[:, 2]) / 2
+    ccx = (c[:, 0] + c[:, 2]) / 2
+    half_w = np.maximum((c[:, 2] - c[:, 0]) / 2, 1e-9)
+    offset = np.clip(np.abs(pcx[:, None] - ccx[None, :]) / half_w[None, :], 0, 1)
+    return contain * (1 - 0.25 * offset)
+
+def associate(plate_boxes, tracked_cars, mode="containment", min_score=None):
+    """Assign each plate to at most one track and each track to at most one plate.
+
+    plate_boxes: [(x1, y1, x2, y2, ...)], tracked_cars: [(car_id, x1, y1, x2, y2)].
+    Returns [(car_id, plate_box)] in plate order, like the old matching loops.
+    """
+    if not len(plate_boxes) or not len(tracked_cars):
+        return []
+    cars = np.asarray([c[1:5] for c in tracked_cars], dtype=np.float32)
+    if mode == "iou":
+        score = iou_matrix(plate_boxes, cars)
+        min_score = MIN_IOU if min_score is None else min_score
+    else:
+        score = containment_matrix(plate_boxes, cars)
+        min_score = MIN_CONTAINMENT if min_score is None else min_score
+
+    rows, cols = linear_sum_assignment(-score)
+    keep = score[rows, cols] >= min_score
+    order = np.argsort(rows[keep])
+    return [(tracked_cars[c][0], tuple(plate_boxes[r]))
+            for r, c in zip(rows[keep][order], cols[keep][order])]
@@ -0,0 +1,271 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import cv2
+import numpy as np
+from association import iou_matrix
+from detector_backend import Result
+from vehicle10headless import HeadlessPipeline, open_source, read_batch, BATCH_SIZE
+
+# ---------------------------
+# Config
+# ---------------------------
+SYNTH_SIZE = (1280, 720)
+SYNTH_CARS = 4
+CAR_COLOR = (160, 60, 20)     # BGR of the synthetic cars (the stub vehicle detector looks for it)
+PLATE_TEXT = "51A12345"
+
+# ---------------------------
+# Synthetic input: cars with plates driving across a static background
+# ---------------------------
+def synthetic_frames(n, size=SYNTH_SIZE, cars=SYNTH_CARS, seed=0):
+    rng = np.random.default_rng(seed)
+    w, h = size
+    bg = np.tile(np.linspace(60, 120, w, dtype=np.uint8)[None, :, None], (h, 1, 3))
+    lanes = [(int(rng.uniform(0.1, 0.8) * h), rng.uniform(2, 8), int(rng.uniform(0, w))) for _ in range(cars)]
+    for i in range(n):
+        frame = bg.copy()
+        for y, speed, x0 in lanes:
+            cw, ch = w // 8, h // 6
+            x = int(x0 + speed * i) % (w + cw) - cw
+            x1, y1, x2, y2 = max(0, x), y, min(w, x + cw), min(h, y + ch)
+            if x2 - x1 < 8: continue
+            cv2.rectangle(frame, (x1, y1), (x2, y2), CAR_COLOR, -1)
+            pw, ph = cw // 3, ch // 6
+            px, py = x + (cw - pw) // 2, y + ch - ph - 6
+            if px < 0 or px + pw > w: continue
+            cv2.rectangle(frame, (px, py), (px + pw, py + ph), (255, 255, 255), -1)
+            cv2.putText(frame, PLATE_TEXT, (px + 2, py + ph - 3), cv2.FONT_HERSHEY_PLAIN, 0.6, (0, 0, 0), 1)
+        yield frame
+
+# ---------------------------
+# Stub backends (no weights): colour-blob detectors, constant OCR, IoU tracker
+# ---------------------------
+class StubDetector:
+    """Finds blobs of one colour; call signature and results match YOLO / OnnxDetector."""
+    def __init__(self, kind="vehicle", latency_ms=0.0, per_frame_ms=0.0):
+        self.kind = kind
+        self.latency = latency_ms / 1000.0
+        self.per_frame = per_frame_ms / 1000.0
+
+    def _mask(self, frame):
+        if self.kind == "vehicle":
+            lo = np.clip(np.array(CAR_COLOR) - 20, 0, 255)
+            return cv2.inRange(frame, lo, np.clip(np.array(CAR_COLOR) + 20, 0, 255))
+        return cv2.inRange(frame, (230, 230, 230), (255, 255, 255))
+
+    def _detect(self, frame):
+        n, _, stats, _ = cv2.connectedComponentsWithStats(self._mask(frame))
+        rows = [(x, y, x + bw, y + bh, 0.9, 0) for x, y, bw, bh, area in stats[1:] if area >= 64]
+        return np.array(rows, np.float32).reshape(-1, 6)
+
+    def __call__(self, source, verbose=False, **kwargs):
+        frames = source if isinstance(source, (list, tuple)) else [source]
+        if self.latency or self.per_frame:
+            time.sleep(self.latency + self.per_frame * len(frames))
+        return [Result(self._detect(f), {0: self.kind}) for f in frames]
+
+class StubOCR:
+    """LicensePlateRecognizer.run() lookalike: (plates, char_probs) for a batch."""
+    def __init__(self, latency_ms=0.0, per_crop_ms=0.0):
+        self.latency = latency_ms / 1000.0
+        self.per_crop = per_crop_ms / 1000.0
+
+    def run(self, images, return_confidence=False):
+        if self.latency or self.per_crop:
+            time.sleep(self.latency + self.per_crop * len(images))
+        plates = [PLATE_TEXT] * len(images)
+        return (plates, np.full((len(images), len(PLATE_TEXT)), 0.95, np.float32)) if return_confidence else plates
+
+class _StubTrack:
+    def __init__(self, track_id, ltrb):
+        self.track_id = track_id
+        self.ltrb = ltrb
+        self.hits = 1
+        self.misses = 0
+
+    def is_confirmed(self):
+        return self.hits >= 3
+
+    def to_ltrb(self):
+        return self.ltrb
+
+class StubTracker:
+    """Greedy IoU tracker with DeepSort's update_tracks() / tracker.predict() surface."""
+    def __init__(self, max_age=30, min_iou=0.3):
+        self.max_age = max_age
+        self.min_iou = min_iou
+        self.tracks = []
+        self.next_id = 1
+        self.tracker = self          # predict_tracks() calls tracker.tracker.predict()
+
+    def predict(self):
+        for t in self.tracks:
+            t.misses += 1
+
+    def update_tracks(self, detections, frame=None):
+        boxes = [(l, t, l + w, t + h) for (l, t, w, h), _, _ in detections]
+        hit_t, hit_d = set(), set()
+        if boxes and self.tracks:
+            iou = iou_matrix([t.ltrb for t in self.tracks], boxes)
+            for ti, j in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+                if iou[ti, j] < self.min_iou: break
+                if ti in hit_t or j in hit_d: continue
+                hit_t.add(ti)
+                hit_d.add(j)
+                tr = self.tracks[ti]
+                tr.ltrb, tr.hits, tr.misses = boxes[j], tr.hits + 1, 0
+        for ti, tr in enumerate(self.tracks):
+            if ti not in hit_t: tr.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_age]
+        for j, b in enumerate(boxes):
+            if j not in hit_d:
+                self.tracks.append(_StubTrack(self.next_id, b))
+                self.next_id += 1
+        return self.tracks
+
+# ---------------------------
+# Measurement
+# ---------------------------
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        mem = psutil.Process().memory_info()
+        return getattr(mem, "peak_wset", mem.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+def percentiles(values):
+    if not values:
+        return {}
+    a = np.asarray(values) * 1000.0
+    return {"mean": float(a.mean()), "p50": float(np.percentile(a, 50)),
+            "p95": float(np.percentile(a, 95)), "p99": float(np.percentile(a, 99)), "max": float(a.max())}
+
+def drive(pipeline, name, batches, tag, source=None):
+    """Run pre-read batches (or a batch iterator) through the pipeline and summarize."""
+    pipeline.reset(tag=tag, source=source)
+    pipeline.stage_s = {}
+    latencies, frames, plates = [], 0, 0
+    t0 = time.perf_counter()
+    for batch in batches:
+        tb = time.perf_counter()
+        out = pipeline.process_batch(batch, frames)
+        dt = time.perf_counter() - tb
+        latencies += [dt] * len(batch)     # every frame of a batch waits for the whole batch
+        frames += len(batch)
+        plates += sum(len(e) for e in out)
+    pipeline.flush()
+    elapsed = time.perf_counter() - t0
+    return {"name": name, "frames": frames, "seconds": elapsed,
+            "fps": frames / elapsed if elapsed > 0 else 0.0,
+            "latency_ms": percentiles(latencies),
+            "stage_ms_per_frame": {k: 1000.0 * v / max(1, frames) for k, v in pipeline.stage_s.items()},
+            "plate_entries": plates}
+
+def batched(frames, size):
+    batch = []
+    for f in frames:
+        batch.append(f)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def clip_batches(path, size, max_frames=0):
+    cap = open_source(path)
+    if not cap.isOpened():
+        raise SystemExit(f"[!] Không mở được file: {path}")
+    n = 0
+    try:
+        while not max_frames or n < max_frames:
+            batch = read_batch(cap, size if not max_frames else min(size, max_frames - n))
+            if not batch: break
+            n += len(batch)
+            yield batch
+    finally:
+        cap.release()
+
+def compare(result, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        base = {r["name"]: r for r in json.load(f)["inputs"]}
+    for r in result["inputs"]:
+        b = base.get(r["name"])
+        if not b: continue
+        d_fps = (r["fps"] / b["fps"] - 1) * 100 if b["fps"] else 0.0
+        d_p95 = (r["latency_ms"].get("p95", 0) / b["latency_ms"]["p95"] - 1) * 100 if b["latency_ms"].get("p95") else 0.0
+        print(f"  vs {baseline_path} [{r['name']}]: fps {d_fps:+.1f}%, p95 latency {d_p95:+.1f}%")
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="End-to-end throughput/latency benchmark of the plate pipeline")
+    ap.add_argument("--synthetic", type=int, default=300, help="synthetic frames (0 = skip)")
+    ap.add_argument("--clip", action="append", default=[], help="recorded clip(s) to replay")
+    ap.add_argument("--max-frames", type=int, default=0, help="stop each clip after N frames")
+    ap.add_argument("--stub", action="store_true", help="stub detectors/OCR/tracker, no weights needed")
+    ap.add_argument("--stub-det-ms", type=float, default=0.0, help="simulated detector cost per frame")
+    ap.add_argument("--stub-ocr-ms", type=float, default=0.0, help="simulated OCR cost per crop")
+    ap.add_argument("--batch", type=int, default=BATCH_SIZE)
+    ap.add_argument("--stride", type=int, default=1)
+    ap.add_argument("--cascade", action="store_true")
+    ap.add_argument("--motion-gate", choices=["diff", "mog2"], default=None)
+    ap.add_argument("--backend", choices=["torch", "onnx", "onnx-int8"], default="torch")
+    ap.add_argument("--label", default="", help="free text stored with the results (version, machine, ...)")
+    ap.add_argument("--out", default="bench.json", help="JSON results file")
+    ap.add_argument("--compare", default=None, help="previous results JSON to diff against")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    work = tempfile.mkdtemp(prefix="bench_")
+    models, tracker_factory = None, None
+    if args.stub:
+        models = {"vehicle": StubDetector("vehicle", per_frame_ms=args.stub_det_ms),
+                  "plate": StubDetector("plate", per_frame_ms=args.stub_det_ms),
+                  "ocr": StubOCR(per_crop_ms=args.stub_ocr_ms)}
+        tracker_factory = StubTracker
+    pipeline = HeadlessPipeline(db_path=os.path.join(work, "bench.db"), cars_dir=os.path.join(work, "cars"),
+                                plates_dir=os.path.join(work, "plates"), cascade=args.cascade,
+                                stride=max(1, args.stride), motion_gate=args.motion_gate, backend=args.backend,
+                                models=models, tracker_factory=tracker_factory)
+    inputs = []
+    try:
+        if args.synthetic:
+            frames = list(synthetic_frames(args.synthetic))   # generated up front, not timed
+            inputs.append(drive(pipeline, "synthetic", batched(frames, max(1, args.batch)), "synthetic"))
+        for clip in args.clip:
+            inputs.append(drive(pipeline, os.path.basename(clip),
+                                clip_batches(clip, max(1, args.batch), args.max_frames),
+                                os.path.splitext(os.path.basename(clip))[0], source=clip))
+    finally:
+        pipeline.close()
+        shutil.rmtree(work, ignore_errors=True)
+
+    result = {"label": args.label, "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+              "python": platform.python_version(), "platform": platform.platform(),
+              "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "clip")},
+              "inputs": inputs, "peak_rss_mb": peak_rss_mb()}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    for r in inputs:
+        lat = r["latency_ms"]
+        stages = ", ".join(f"{k} {v:.2f}" for k, v in r["stage_ms_per_frame"].items())
+        print(f"{r['name']}: {r['frames']} frames, {r['fps']:.1f} frames/s, latency p50 {lat.get('p50', 0):.1f} / "
+              f"p95 {lat.get('p95', 0):.1f} / p99 {lat.get('p99', 0):.1f} ms; ms/frame: {stages}")
+    print(f"peak RSS: {result['peak_rss_mb']} MB -> {args.out}")
+    if args.compare:
+        compare(result, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import os
+import time
+import cv2
+import numpy as np
+from datetime import datetime
+
+# ---------------------------
+# Best shot per track: one car/plate image per vehicle instead of per frame
+# ---------------------------
+BEST_SHOT_TIMEOUT = 10.0      # write the current best after this many seconds, even if the track lives on
+REF_PLATE_AREA = 120 * 40     # plate area (px) that counts as "big enough"
+REF_SHARPNESS = 300.0         # Laplacian variance that counts as "sharp"
+W_SIZE, W_SHARP, W_CONF = 0.4, 0.3, 0.3
+
+def sharpness(img):
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+def shot_score(plate_crop, ocr_conf=None):
+    """Score in [0, 1] from plate size, sharpness and OCR confidence (None = unknown)."""
+    if plate_crop is None or plate_crop.size == 0:
+        return 0.0
+    h, w = plate_crop.shape[:2]
+    size = min(1.0, (w * h) / REF_PLATE_AREA)
+    sharp = min(1.0, sharpness(plate_crop) / REF_SHARPNESS)
+    if ocr_conf is None:
+        conf = 0.5
+    else:
+        conf = float(np.mean(ocr_conf)) if np.ndim(ocr_conf) else float(ocr_conf)
+    return W_SIZE * size + W_SHARP * sharp + W_CONF * conf
+
+class _Shot:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.monotonic()
+        self.score = -1.0
+        self.car = None
+        self.plate = None
+        self.dirty = False      # holds a shot that is better than what is on disk
+        self.written = False
+
+class BestShots:
+    """Keeps only the highest-scoring crop of every track in memory.
+
+    Paths are fixed per track (car_<name>.jpg / plate_<name>.jpg), so they can be
+    logged before the file exists; a later, better shot overwrites the same file.
+    Crops are copied only when they beat the current best.
+    """
+    def __init__(self, writer, cars_dir, plates_dir, timeout=BEST_SHOT_TIMEOUT):
+        self.writer = writer
+        self.cars_dir = cars_dir
+        self.plates_dir = plates_dir
+        self.timeout = timeout
+        self.shots = {}
+        self.written = 0
+        self.offered = 0
+
+    def _shot(self, track_id, tag=""):
+        s = self.shots.get(track_id)
+        if s is None:
+            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+            s = self.shots[track_id] = _Shot(f"{tag}_{track_id}_{ts}" if tag else f"{track_id}_{ts}")
+        return s
+
+    def paths(self, track_id, tag=""):
+        s = self._shot(track_id, tag)
+        return (os.path.join(self.cars_dir, f"car_{s.name}.jpg"),
+                os.path.join(self.plates_dir, f"plate_{s.name}.jpg"))
+
+    def offer(self, track_id, car_crop, plate_crop, ocr_conf=None, tag=""):
+        """Offer one frame's crops; return True if it became the track's best shot."""
+        self.offered += 1
+        s = self._shot(track_id, tag)
+        score = shot_score(plate_crop, ocr_conf)
+        if score <= s.score:
+            return False
+        s.score = score
+        s.car = car_crop.copy() if car_crop is not None else None
+        s.plate = plate_crop.copy() if plate_crop is not None else None
+        s.dirty = True
+        return True
+
+    def _write(self, track_id):
+        s = self.shots[track_id]
+        if not s.dirty:
+            return
+        car_path, plate_path = self.paths(track_id)
+        if s.car is not None and s.car.size > 0:
+            self.writer.save(s.car, car_path)
+        if s.plate is not None and s.plate.size > 0:
+            self.writer.save(s.plate, plate_path)
+        s.dirty = False
+        s.written = True
+        self.written += 1
+
+    def finish(self, track_id):
+        """Track ended: write its best shot (if not on disk yet) and forget it."""
+        if track_id not in self.shots:
+            return None
+        self._write(track_id)
+        paths = self.paths(track_id)
+        s = self.shots.pop(track_id)
+        return paths if s.written else None
+
+    def expire(self, active_ids=None):
+        """Finish tracks that are gone and write the best shot of tracks older than the timeout."""
+        now = time.monotonic()
+        if active_ids is not None:
+            active = set(active_ids)
+            for tid in [t for t in self.shots if t not in active]:
+                self.finish(tid)
+        for tid, s in self.shots.items():
+            if s.dirty and now - s.started >= self.timeout:
+                self._write(tid)
+                s.started = now
+
+    def finish_all(self):
+        for tid in list(self.shots):
+            self.finish(tid)
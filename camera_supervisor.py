@@ -0,0 +1,228 @@
+import os
+import sys
+import time
+import queue
+import multiprocessing as mp
+from frame_pool import FramePool
+
+# ---------------------------
+# Process-per-camera supervisor
+# ---------------------------
+PREVIEW_WIDTH = 480       # preview frames are downscaled to this width
+PREVIEW_FPS = 5           # ...and sent at most this often per camera
+PREVIEW_SLOTS = 4         # shared-memory preview slots per camera
+MAX_RESTARTS = 5          # per camera, then it stays down
+RESTART_BACKOFF = 2.0     # seconds, doubled after every restart
+EXIT_STREAM_LOST = 3      # live source stopped delivering -> restart (reconnect)
+THREAD_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+def cpu_sets(n):
+    """Split the CPUs this process may use into n disjoint, contiguous sets."""
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    if n <= 0:
+        return []
+    size = max(1, len(cpus) // n)
+    return [cpus[i * size:(i + 1) * size] or [cpus[i % len(cpus)]] for i in range(n)]
+
+def _thread_env(cpus):
+    """Environment the worker must start with so its BLAS/OpenMP pools size to the CPU set."""
+    n = str(len(cpus))
+    return {var: n for var in THREAD_VARS}
+
+def _pin(cpus):
+    # Affinity only: the thread-count variables are read when numpy/cv2 load, and a
+    # spawned child imports this module (frame_pool) and the GUI's main module before
+    # camera_worker runs, so start() hands them over in the inherited environment
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+def _preview(cv2, pool, frame, tracks, width):
+    """Downscale straight into a shared slot and annotate it there -> FrameHandle or None."""
+    h, w = frame.shape[:2]
+    scale = width / w
+    handle = pool.put(frame, size=(width, int(h * scale)))
+    if handle is None:
+        return None   # GUI still holds every slot
+    small = pool.view(handle)
+    for car_id, x1, y1, x2, y2 in tracks:
+        x1, y1, x2, y2 = (int(v * scale) for v in (x1, y1, x2, y2))
+        cv2.rectangle(small, (x1, y1), (x2, y2), (0, 255, 0), 1)
+        cv2.putText(small, str(car_id), (x1, max(10, y1 - 3)), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 0), 1)
+    return handle
+
+def camera_worker(cam_id, source, events, previews, stop, cpus, opts, preview_width, preview_fps, pool_spec):
+    """Body of one worker process: capture -> HeadlessPipeline -> compact events."""
+    if cpus:
+        _pin(cpus)
+    import cv2
+    pool = FramePool.attach(pool_spec)
+    from vehicle10headless import HeadlessPipeline, open_source, is_live
+    if cpus:
+        cv2.setNumThreads(len(cpus))
+        try:
+            import torch
+            torch.set_num_threads(len(cpus))
+        except ImportError:
+            pass
+
+    if cpus and opts.get("backend", "torch") != "torch":
+        opts = dict(opts, ort_threads=opts.get("ort_threads") or len(cpus))
+    pipeline = HeadlessPipeline(**opts)
+    cap = open_source(source)
+    if not cap.isOpened():
+        events.put(("error", cam_id, f"Không mở được: {source}"))
+        sys.exit(EXIT_STREAM_LOST if is_live(source) else 2)
+    pipeline.reset(tag=f"cam{cam_id}", fps=cap.get(cv2.CAP_PROP_FPS), source=source)
+    events.put(("started", cam_id, os.getpid()))
+
+    frames, lost = 0, False
+    interval = 1.0 / preview_fps if preview_fps else None
+    last_preview = 0.0
+    try:
+        while not stop.is_set():
+            ret, frame = cap.read(timeout=5.0)
+            if not ret:
+                lost = is_live(source)
+                break
+            for e in pipeline.process(frame, frames):
+                events.put(("plate", cam_id, {"car_id": e["car_id"], "plate_text": e["plate_text"],
+                                              "car_path": e["car_path"], "plate_path": e["plate_path"],
+                                              "ts": e["ts"]}))
+            frames += 1
+            now = time.monotonic()
+            if interval and now - last_preview >= interval:
+                last_preview = now
+                handle = _preview(cv2, pool, frame, pipeline.last_tracks, preview_width)
+                try:
+                    if handle: previews.put_nowait((cam_id, handle))
+                except queue.Full:
+                    pool.release(handle)  # GUI is behind: skip this preview, never block the pipeline
+    finally:
+        pool.close()
+        cap.release()
+        pipeline.flush()
+        pipeline.close()
+        events.put(("stopped", cam_id, frames))
+    sys.exit(EXIT_STREAM_LOST if lost else 0)
+
+class CameraSupervisor:
+    """Runs every camera pipeline in its own process (own GIL, own CPU set).
+
+    start_all(sources) spawns one worker per source, pinned to a disjoint CPU
+    set. poll() is called from the GUI loop: it drains recognition events
+    ("started" / "plate" / "error" / "stopped", cam_id, payload), returns the latest
+    preview per camera, and restarts workers that crashed or lost a live
+    stream (exponential backoff, at most `max_restarts` times). Workers that
+    reached the end of a file exit cleanly and are not restarted.
+
+    Previews travel as FrameHandles into a per-camera shared-memory FramePool:
+    the worker resizes into a slot, the GUI reads a view and releases it.
+    """
+    def __init__(self, pipeline_opts=None, preview_width=PREVIEW_WIDTH, preview_fps=PREVIEW_FPS,
+                 max_restarts=MAX_RESTARTS, pin_cpus=True):
+        self.ctx = mp.get_context("spawn")   # no forked torch/Tk state in the workers
+        self.opts = dict(pipeline_opts or {})
+        self.preview_width = preview_width
+        self.preview_fps = preview_fps
+        self.max_restarts = max_restarts
+        self.pin_cpus = pin_cpus
+        self.events = self.ctx.Queue()
+        self.previews = self.ctx.Queue(maxsize=16)
+        self.workers = {}   # cam_id -> dict(source, cpus, proc, stop, restarts, next_start)
+        self.pools = {}     # cam_id -> FramePool of preview slots (owned here, survives restarts)
+
+    def start_all(self, sources):
+        sets = cpu_sets(len(sources)) if self.pin_cpus else [None] * len(sources)
+        for cam_id, (source, cpus) in enumerate(zip(sources, sets)):
+            self.start(cam_id, source, cpus)
+
+    def start(self, cam_id, source, cpus=None):
+        w = self.workers.setdefault(cam_id, {"source": source, "cpus": cpus, "restarts": 0,
+                                             "proc": None, "stop": None, "next_start": 0.0})
+        pool = self.pools.get(cam_id)
+        if pool is None:
+            # Room for portrait sources too: height up to twice the preview width
+            pool = self.pools[cam_id] = FramePool(PREVIEW_SLOTS, (2 * self.preview_width, self.preview_width, 3),
+                                                  lock=self.ctx.Lock())
+        else:
+            pool.reset()
+        w["stop"] = self.ctx.Event()
+        w["proc"] = self.ctx.Process(target=camera_worker, name=f"camera-{cam_id}", daemon=True,
+                                     args=(cam_id, source, self.events, self.previews, w["stop"], cpus,
+                                           self.opts, self.preview_width, self.preview_fps, pool.spec()))
+        env = _thread_env(cpus) if cpus else {}
+        saved = {var: os.environ.get(var) for var in env}
+        os.environ.update(env)
+        try:
+            w["proc"].start()
+        finally:
+            for var, value in saved.items():
+                if value is None:
+                    os.environ.pop(var, None)
+                else:
+                    os.environ[var] = value
+
+    def _check(self):
+        now = time.monotonic()
+        for cam_id, w in self.workers.items():
+            proc = w["proc"]
+            if proc is None or proc.is_alive() or w["stop"].is_set():
+                continue
+            if proc.exitcode == 0 or w["restarts"] >= self.max_restarts:
+                w["proc"] = None
+                continue
+            if not w["next_start"]:
+                w["next_start"] = now + RESTART_BACKOFF * 2 ** w["restarts"]
+            elif now >= w["next_start"]:
+                w["restarts"] += 1
+                w["next_start"] = 0.0
+                self.events.put(("restart", cam_id, w["restarts"]))
+                self.start(cam_id, w["source"], w["cpus"])
+
+    def poll(self):
+        """-> (events, {cam_id: FrameHandle}); never blocks.
+
+        The caller owns the returned handles: view() them, then release() them."""
+        self._check()
+        events, previews = [], {}
+        while True:
+            try: events.append(self.events.get_nowait())
+            except queue.Empty: break
+        while True:
+            try:
+                cam_id, handle = self.previews.get_nowait()
+            except queue.Empty:
+                break
+            if cam_id in previews:
+                self.pools[cam_id].release(previews[cam_id])   # superseded before it was shown
+            previews[cam_id] = handle
+        return events, previews
+
+    def view(self, cam_id, handle):
+        return self.pools[cam_id].view(handle)
+
+    def release(self, cam_id, handle):
+        self.pools[cam_id].release(handle)
+
+    def status(self):
+        return {cam_id: {"alive": bool(w["proc"] and w["proc"].is_alive()), "restarts": w["restarts"],
+                         "cpus": w["cpus"]} for cam_id, w in self.workers.items()}
+
+    def stop(self, cam_id, timeout=10.0):
+        w = self.workers.get(cam_id)
+        if not w or w["proc"] is None:
+            return
+        w["stop"].set()
+        w["proc"].join(timeout)
+        if w["proc"].is_alive():
+            w["proc"].terminate()
+        w["proc"] = None
+
+    def stop_all(self, timeout=10.0):
+        for w in self.workers.values():
+            if w["proc"] is not None: w["stop"].set()
+        for cam_id in list(self.workers):
+            self.stop(cam_id, timeout)
+        for pool in self.pools.values():
+            pool.unlink()
+        self.pools = {}
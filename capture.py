@@ -0,0 +1,82 @@
+import threading
+from collections import deque
+
+# ---------------------------
+# Capture thread: decode in the background, hand out the newest frame
+# ---------------------------
+BUFFER_SIZE = 2
+
+class FrameGrabber:
+    """Wraps a cv2.VideoCapture and decodes it on its own thread.
+
+    Live mode (default): a small drop-oldest ring buffer; read() returns the newest
+    frame and everything older is counted in `dropped`, so the pipeline never lags
+    behind the camera. Lossless mode (files): the decoder waits for the consumer and
+    every frame is delivered in order.
+
+    read()/isOpened()/get()/release() mirror cv2.VideoCapture, so it is a drop-in
+    replacement inside the existing video loops.
+    """
+    def __init__(self, cap, buffer_size=BUFFER_SIZE, lossless=False):
+        self.cap = cap
+        self.lossless = lossless
+        self.buf = deque(maxlen=None if lossless else buffer_size)
+        self.buffer_size = buffer_size
+        self.cond = threading.Condition()
+        self.running = True
+        self.ended = False
+        self.grabbed = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            with self.cond:
+                if not ret:
+                    break
+                self.grabbed += 1
+                if self.lossless:
+                    while self.running and len(self.buf) >= self.buffer_size:
+                        self.cond.wait()
+                elif len(self.buf) == self.buf.maxlen:
+                    self.dropped += 1  # deque drops the oldest on append
+                self.buf.append(frame)
+                self.cond.notify_all()
+        with self.cond:
+            self.ended = True
+            self.cond.notify_all()
+
+    def read(self, timeout=None):
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.buf or self.ended or not self.running, timeout):
+                return False, None
+            if not self.buf:
+                return False, None
+            if self.lossless:
+                frame = self.buf.popleft()
+            else:
+                frame = self.buf.pop()
+                self.dropped += len(self.buf)
+                self.buf.clear()
+            self.delivered += 1
+            self.cond.notify_all()
+            return True, frame
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def stats(self):
+        return {"grabbed": self.grabbed, "delivered": self.delivered, "dropped": self.dropped}
+
+    def release(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        self.thread.join(timeout=1.0)
+        self.cap.release()
@@ -0,0 +1,48 @@
+import numpy as np
+from yolo_utils import result_arrays
+
+# ---------------------------
+# Cascade: plate detector on tracked-vehicle crops only
+# ---------------------------
+CASCADE_PAD = 0.05        # grow each car box by 5% per side (plates sit on the bumper edge)
+CASCADE_MAX_IMGSZ = 640   # upper bound for the crop batch input size
+CASCADE_MIN_CROP = 24     # ignore tracks smaller than this (px)
+
+def track_crops(frame, tracked_cars, pad=CASCADE_PAD, min_size=CASCADE_MIN_CROP):
+    """Return [(car_id, (x1, y1, x2, y2))] and the matching crop views, clipped to the frame."""
+    h, w = frame.shape[:2]
+    boxes, crops = [], []
+    for car_id, x1, y1, x2, y2 in tracked_cars:
+        px, py = int((x2 - x1) * pad), int((y2 - y1) * pad)
+        x1, y1 = max(0, x1 - px), max(0, y1 - py)
+        x2, y2 = min(w, x2 + px), min(h, y2 + py)
+        if x2 - x1 < min_size or y2 - y1 < min_size: continue
+        boxes.append((car_id, (x1, y1, x2, y2)))
+        crops.append(frame[y1:y2, x1:x2])
+    return boxes, crops
+
+def batch_imgsz(crops, max_imgsz=CASCADE_MAX_IMGSZ):
+    # Every crop in a batch is letterboxed to the same square, so size it to the
+    # largest crop instead of the full-frame default.
+    side = max(max(c.shape[:2]) for c in crops)
+    return int(min(max_imgsz, (side + 31) // 32 * 32))
+
+def detect_plates_in_tracks(model, frame, tracked_cars, conf=0.25, max_imgsz=CASCADE_MAX_IMGSZ,
+                            pad=CASCADE_PAD):
+    """Run the plate model once over all confirmed-track crops.
+
+    Returns [(car_id, (px1, py1, px2, py2), conf)] in frame coordinates, best plate per car.
+    """
+    boxes, crops = track_crops(frame, tracked_cars, pad)
+    if not crops:
+        return []
+    results = model(crops, imgsz=batch_imgsz(crops, max_imgsz), verbose=False)
+
+    best = {}
+    for (car_id, (ox, oy, _, _)), res in zip(boxes, results):
+        xyxy, confs, _ = result_arrays(res, conf=conf)
+        if len(confs) == 0: continue
+        i = int(np.argmax(confs))
+        px1, py1, px2, py2 = xyxy[i].tolist()
+        best[car_id] = ((px1 + ox, py1 + oy, px2 + ox, py2 + oy), float(confs[i]))
+    return [(car_id, box, c) for car_id, (box, c) in best.items()]
@@ -0,0 +1,126 @@
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+from metrics import METRICS
+
+# ---------------------------
+# Group-commit SQLite writer (WAL)
+# ---------------------------
+COMMIT_EVERY = 50       # events per transaction
+COMMIT_MS = 200         # ...or this long after the first pending event
+
+class DBWriter:
+    """Single writer thread that applies log events in batched transactions.
+
+    execute(sql, params) enqueues one statement; consecutive events with the same
+    SQL are applied with executemany. submit(fn) enqueues a callable fn(cursor) for
+    read-modify-write logic that must run on the writer connection. The thread
+    commits every `commit_every` events or `commit_ms` milliseconds, so frame loops
+    never wait for an fsync. The database is switched to WAL so readers (GUI,
+    reports) are not blocked by the writer.
+    """
+    def __init__(self, path, schema=(), commit_every=COMMIT_EVERY, commit_ms=COMMIT_MS):
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_s = commit_ms / 1000.0
+        self.q = queue.Queue()
+        self.lock = threading.Lock()
+        self.events = 0
+        self.commits = 0
+        self.errors = 0
+        self.closed = False
+        # Connect and create the schema here, so a bad path or locked file raises in the
+        # caller like sqlite3.connect does; the thread only ever uses this connection
+        db = self._connect()
+        try:
+            for sql in schema:
+                db.execute(sql)
+            db.commit()
+        except sqlite3.Error:
+            db.close()
+            raise
+        self.thread = threading.Thread(target=self._run, args=(db,), daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _run(self, db):
+        cur = db.cursor()
+        stop = False
+        while not stop:
+            item = self.q.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.commit_s
+            while len(batch) < self.commit_every:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0: break
+                try:
+                    item = self.q.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._apply(db, cur, batch)
+        db.close()
+
+    def _apply(self, db, cur, batch):
+        t0 = time.perf_counter()
+        i = 0
+        try:
+            while i < len(batch):
+                kind, sql, params = batch[i]
+                if kind == "fn":
+                    # Any failure of a callable (not only sqlite3.Error) must not kill the thread
+                    try: sql(cur)
+                    except Exception: self.errors += 1
+                    i += 1
+                    continue
+                # Same statement back to back -> one executemany
+                j = i
+                rows = []
+                while j < len(batch) and batch[j][0] == "sql" and batch[j][1] == sql:
+                    rows.append(batch[j][2])
+                    j += 1
+                try: cur.executemany(sql, rows)
+                except sqlite3.Error: self.errors += 1
+                i = j
+            db.commit()
+        except sqlite3.Error:
+            db.rollback()
+            self.errors += 1
+        with self.lock:
+            self.events += len(batch)
+            self.commits += 1
+        METRICS.observe("db_commit", time.perf_counter() - t0)
+        METRICS.set("db_pending", self.q.qsize())
+
+    def execute(self, sql, params=()):
+        if self.closed: return
+        self.q.put(("sql", sql, tuple(params)))
+
+    def submit(self, fn):
+        if self.closed: return
+        self.q.put(("fn", fn, None))
+
+    def stats(self):
+        with self.lock:
+            return {"pending": self.q.qsize(), "events": self.events,
+                    "commits": self.commits, "errors": self.errors}
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.q.put(None)
+        self.thread.join()
@@ -0,0 +1,182 @@
+import os
+import ast
+import sys
+import glob
+import argparse
+import cv2
+import numpy as np
+
+# ---------------------------
+# Detector backends: PyTorch (ultralytics) or ONNX Runtime (fp32 / int8)
+# ---------------------------
+DETECTOR_BACKEND = "torch"   # "torch" | "onnx" | "onnx-int8"
+IMGSZ = 640                  # input size of the exported graphs (they are dynamic, any /32 works)
+ORT_THREADS = None           # intra-op threads; None = onnxruntime default (all cores)
+CONF = 0.25                  # same defaults as ultralytics predict
+IOU = 0.7
+MAX_DET = 300
+CALIB_DIRS = ("saved_cars", "saved_plates")
+CALIB_IMAGES = 200
+
+def onnx_path(weights, int8=False):
+    base = os.path.splitext(weights)[0]
+    return f"{base}.int8.onnx" if int8 else f"{base}.onnx"
+
+def letterbox(img, size):
+    """Resize keeping aspect ratio and pad to size x size (ultralytics style, pad 114)."""
+    h, w = img.shape[:2]
+    gain = min(size / h, size / w)
+    nw, nh = int(round(w * gain)), int(round(h * gain))
+    out = np.full((size, size, 3), 114, np.uint8)
+    px, py = (size - nw) // 2, (size - nh) // 2
+    out[py:py + nh, px:px + nw] = cv2.resize(img, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    return out, gain, (px, py)
+
+def to_blob(images):
+    # BGR HWC uint8 -> RGB NCHW float32 in [0, 1]
+    batch = np.stack(images)[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+# ---------------------------
+# Export / quantization
+# ---------------------------
+def export_onnx(weights, imgsz=IMGSZ):
+    from ultralytics import YOLO
+    # dynamic: batch and input size are free, so one file serves every imgsz
+    return YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+
+class CropCalibration:
+    """onnxruntime CalibrationDataReader over our own saved crops."""
+    def __init__(self, input_name, dirs=CALIB_DIRS, imgsz=IMGSZ, limit=CALIB_IMAGES):
+        paths = []
+        for d in dirs:
+            paths += sorted(glob.glob(os.path.join(d, "*.jpg")))
+        self.paths = paths[:limit]
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self.i = 0
+
+    def get_next(self):
+        while self.i < len(self.paths):
+            img = cv2.imread(self.paths[self.i])
+            self.i += 1
+            if img is not None:
+                return {self.input_name: to_blob([letterbox(img, self.imgsz)[0]])}
+        return None
+
+    def rewind(self):
+        self.i = 0
+
+def quantize_int8(fp32_path, int8_path, calib_dirs=CALIB_DIRS, imgsz=IMGSZ, limit=CALIB_IMAGES):
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+    input_name = ort.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    reader = CropCalibration(input_name, calib_dirs, imgsz, limit)
+    if not reader.paths:
+        raise RuntimeError(f"no calibration images in {calib_dirs}")
+    quantize_static(fp32_path, int8_path, reader, quant_format=QuantFormat.QDQ, per_channel=True,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    return int8_path
+
+# ---------------------------
+# ONNX Runtime detector (same result shape the loops read: result.boxes.data (N, 6))
+# ---------------------------
+class Boxes:
+    def __init__(self, data):
+        self.data = data                    # float32 (N, 6): x1 y1 x2 y2 conf cls
+        self.xyxy = data[:, :4]
+        self.conf = data[:, 4]
+        self.cls = data[:, 5]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return (Boxes(self.data[i:i + 1]) for i in range(len(self.data)))
+
+class Result:
+    def __init__(self, data, names):
+        self.boxes = Boxes(data)
+        self.names = names
+
+class OnnxDetector:
+    """Drop-in for YOLO(...) in the frame loops: model(frame or [frames], imgsz=, conf=)."""
+    def __init__(self, path, imgsz=IMGSZ, threads=ORT_THREADS, names=None):
+        import onnxruntime as ort
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+            opts.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.imgsz = imgsz
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.names = names or (ast.literal_eval(meta["names"]) if "names" in meta else {})
+
+    def __call__(self, source, imgsz=None, conf=CONF, iou=IOU, max_det=MAX_DET, verbose=False, **kwargs):
+        frames = source if isinstance(source, (list, tuple)) else [source]
+        if not frames:
+            return []
+        size = int(imgsz or self.imgsz)
+        boxed = [letterbox(f, size) for f in frames]
+        out = self.session.run(None, {self.input_name: to_blob([b[0] for b in boxed])})[0]
+        return [Result(self._postprocess(pred, gain, pad, f.shape[:2], conf, iou, max_det), self.names)
+                for pred, (_, gain, pad), f in zip(out, boxed, frames)]
+
+    def _postprocess(self, pred, gain, pad, shape, conf, iou, max_det):
+        pred = pred.T                                   # (anchors, 4 + classes), boxes as cx cy w h
+        scores = pred[:, 4:]
+        cls = scores.argmax(1)
+        best = scores[np.arange(len(scores)), cls]
+        keep = best >= conf
+        if not keep.any():
+            return np.zeros((0, 6), np.float32)
+        xywh, best, cls = pred[keep, :4], best[keep], cls[keep]
+        xy = xywh[:, :2] - xywh[:, 2:] / 2
+        # Per-class NMS in one call: shift every class into its own coordinate range
+        shifted = np.concatenate([xy + cls[:, None] * 4096.0, xywh[:, 2:]], axis=1)
+        idx = cv2.dnn.NMSBoxes(shifted.tolist(), best.tolist(), conf, iou)
+        idx = np.array(idx, int).reshape(-1)[:max_det]
+        xyxy = np.concatenate([xy[idx], xy[idx] + xywh[idx, 2:]], axis=1)
+        xyxy = (xyxy - np.array([pad[0], pad[1], pad[0], pad[1]], np.float32)) / gain
+        h, w = shape
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, w)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, h)
+        return np.concatenate([xyxy, best[idx, None], cls[idx, None]], axis=1).astype(np.float32)
+
+def load_detector(weights, backend=DETECTOR_BACKEND, imgsz=IMGSZ, threads=ORT_THREADS):
+    """YOLO(weights) for "torch"; otherwise export (and quantize) once, then run on onnxruntime."""
+    if backend == "torch":
+        from ultralytics import YOLO
+        return YOLO(weights)
+    if backend not in ("onnx", "onnx-int8"):
+        raise ValueError(f"unknown detector backend: {backend}")
+    fp32 = onnx_path(weights)
+    if not os.path.exists(fp32):
+        export_onnx(weights, imgsz)
+    path = fp32
+    if backend == "onnx-int8":
+        path = onnx_path(weights, int8=True)
+        if not os.path.exists(path):
+            quantize_int8(fp32, path, imgsz=imgsz)
+    return OnnxDetector(path, imgsz=imgsz, threads=threads)
+
+# python detector_backend.py yolov8n-vehicle.pt license_plate_detector.pt --int8 --calib saved_cars
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export YOLO weights to ONNX (and int8) for the onnx backends")
+    ap.add_argument("weights", nargs="+")
+    ap.add_argument("--imgsz", type=int, default=IMGSZ)
+    ap.add_argument("--int8", action="store_true", help="also write a static int8 model")
+    ap.add_argument("--calib", nargs="+", default=list(CALIB_DIRS), help="folders with calibration crops")
+    ap.add_argument("--calib-images", type=int, default=CALIB_IMAGES)
+    args = ap.parse_args(argv)
+    for weights in args.weights:
+        fp32 = export_onnx(weights, args.imgsz)
+        print(f"{weights} -> {fp32}")
+        if args.int8:
+            int8 = quantize_int8(fp32, onnx_path(weights, int8=True), args.calib, args.imgsz, args.calib_images)
+            print(f"{weights} -> {int8}")
+
+if __name__ == "__main__":
+    sys.exit(main())
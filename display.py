@@ -0,0 +1,91 @@
+import threading
+import cv2
+from PIL import Image, ImageTk
+
+# ---------------------------
+# Video display: latest-frame slot filled by the worker, drawn by the Tk main loop
+# ---------------------------
+DISPLAY_SIZE = (800, 450)
+DISPLAY_FPS = 15
+
+class LatestFrame:
+    """Single slot: publish() replaces whatever the display has not shown yet.
+
+    The worker hands over its finished frame and moves on (no copy, no Tk call);
+    it must not draw on that array afterwards. take() returns the frame only if
+    it is newer than the last one taken, else None.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frame = None
+        self.seq = 0
+        self.taken = 0
+        self.published = 0
+
+    def publish(self, frame):
+        with self.lock:
+            self.frame = frame
+            self.seq += 1
+            self.published += 1
+
+    def take(self):
+        with self.lock:
+            if self.seq == self.taken:
+                return None
+            self.taken = self.seq
+            return self.frame
+
+    def clear(self):
+        with self.lock:
+            self.frame = None
+            self.taken = self.seq
+
+class FrameView:
+    """Draws BGR frames into a Tk label at a fixed size, on the Tk thread only.
+
+    The resize and colour conversion write into buffers kept between calls, and the
+    PhotoImage is pasted into instead of rebuilt, so one refresh allocates nothing
+    frame-sized.
+    """
+    def __init__(self, label, size=DISPLAY_SIZE):
+        self.label = label
+        self.size = size
+        self.small = None
+        self.rgb = None
+        self.photo = None
+
+    def show(self, frame):
+        w, h = self.size
+        if self.small is None:
+            self.small = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+            self.rgb = self.small.copy()
+        else:
+            cv2.resize(frame, (w, h), dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        img = Image.fromarray(self.rgb)
+        if self.photo is None:
+            self.photo = ImageTk.PhotoImage(image=img)
+            self.label.config(image=self.photo)
+            self.label.image = self.photo
+        else:
+            self.photo.paste(img)
+            # Another view (e.g. a selected row's thumbnail) may have taken the label over
+            if self.label.cget("image") != str(self.photo):
+                self.label.config(image=self.photo)
+                self.label.image = self.photo
+
+def refresh_loop(widget, slot, view, fps=DISPLAY_FPS, on_tick=None):
+    """Pull the newest frame every 1/fps s with after(); on_tick() runs on each tick."""
+    interval = max(1, int(1000 / fps))
+
+    def tick():
+        if not widget.winfo_exists():
+            return
+        frame = slot.take()
+        if frame is not None:
+            view.show(frame)
+        if on_tick:
+            on_tick()
+        widget.after(interval, tick)
+
+    widget.after(interval, tick)
@@ -0,0 +1,104 @@
+import os
+import numpy as np
+from datetime import datetime
+from association import associate
+from best_shot import sharpness
+from yolo_utils import result_arrays
+
+# ---------------------------
+# Driver faces: one detector pass per stride over the driver-side regions, best face per track
+# ---------------------------
+# Driver seat inside a car box as fractions (x1, y1, x2, y2). Camera facing the front of
+# a left-hand-drive car: the driver sits on the image's right. Mirror it for RHD / rear cameras.
+DRIVER_REGION = (0.45, 0.0, 1.0, 0.7)
+FACE_STRIDE = 3               # run the face detector every k frames
+FACE_CONF = 0.35
+MIN_FACE_CONTAINMENT = 0.6    # share of the face box that must lie in the driver region
+REF_FACE_AREA = 60 * 60
+REF_SHARPNESS = 150.0
+FACE_BETTER = 1.1             # a new face must beat the stored one by 10% to be rewritten
+
+def driver_regions(tracked_cars, shape, region=DRIVER_REGION):
+    """[(car_id, x1, y1, x2, y2)] of the driver-side part of every car box, clipped to the frame."""
+    h, w = shape[:2]
+    rx1, ry1, rx2, ry2 = region
+    out = []
+    for car_id, x1, y1, x2, y2 in tracked_cars:
+        bw, bh = x2 - x1, y2 - y1
+        box = (max(0, int(x1 + rx1 * bw)), max(0, int(y1 + ry1 * bh)),
+               min(w, int(x1 + rx2 * bw)), min(h, int(y1 + ry2 * bh)))
+        if box[2] > box[0] and box[3] > box[1]:
+            out.append((car_id, *box))
+    return out
+
+def detect_faces(model, frame, regions, conf=FACE_CONF, **kwargs):
+    """One model call on the bounding crop of all regions -> (xyxy, conf) in frame coordinates."""
+    if not regions:
+        return np.zeros((0, 4), np.int32), np.zeros(0, np.float32)
+    boxes = np.asarray([r[1:] for r in regions])
+    x1, y1 = boxes[:, :2].min(axis=0)
+    x2, y2 = boxes[:, 2:].max(axis=0)
+    xyxy, confs, _ = result_arrays(model(frame[y1:y2, x1:x2], verbose=False, **kwargs)[0], conf)
+    return xyxy + np.array([x1, y1, x1, y1], np.int32), confs
+
+def face_score(crop, conf):
+    h, w = crop.shape[:2]
+    size = min(1.0, (w * h) / REF_FACE_AREA)
+    sharp = min(1.0, sharpness(crop) / REF_SHARPNESS)
+    return 0.4 * size + 0.2 * sharp + 0.4 * float(conf)
+
+class BestFaces:
+    """Best driver face of every track.
+
+    update() runs the detector once (every `stride` frames) on the union of the
+    cars' driver regions and assigns faces to tracks one-to-one by containment.
+    The face file of a track has a fixed path and is rewritten only when a clearly
+    better face arrives, so it can be logged before it is written.
+    """
+    def __init__(self, writer, faces_dir, stride=FACE_STRIDE, region=DRIVER_REGION, conf=FACE_CONF):
+        self.writer = writer
+        self.faces_dir = faces_dir
+        self.stride = max(1, int(stride))
+        self.region = region
+        self.conf = conf
+        self.count = 0
+        self.best = {}        # track_id -> (score, path)
+        self.calls = 0
+
+    def due(self):
+        self.count += 1
+        return (self.count - 1) % self.stride == 0
+
+    def update(self, model, frame, tracked_cars, **kwargs):
+        """Detect and assign faces for tracked_cars [(car_id, x1, y1, x2, y2)]; returns {car_id: face box}."""
+        regions = driver_regions(tracked_cars, frame.shape, self.region)
+        if not regions:
+            return {}
+        self.calls += 1
+        xyxy, confs = detect_faces(model, frame, regions, self.conf, **kwargs)
+        face_conf = {tuple(b): c for b, c in zip(xyxy.tolist(), confs.tolist())}
+        found = {}
+        for car_id, box in associate(list(face_conf), regions, min_score=MIN_FACE_CONTAINMENT):
+            fx1, fy1, fx2, fy2 = box
+            crop = frame[fy1:fy2, fx1:fx2]
+            if crop.size == 0:
+                continue
+            found[car_id] = box
+            score = face_score(crop, face_conf[box])
+            old = self.best.get(car_id)
+            if old is not None and score <= old[0] * FACE_BETTER:
+                continue
+            path = old[1] if old else os.path.join(
+                self.faces_dir, f"face_{car_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg")
+            self.writer.save(crop.copy(), path)
+            self.best[car_id] = (score, path)
+        return found
+
+    def path(self, track_id):
+        best = self.best.get(track_id)
+        return best[1] if best else None
+
+    def evict(self, active_ids):
+        active = set(active_ids)
+        for tid in [t for t in self.best if t not in active]:
+            del self.best[tid]
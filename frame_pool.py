@@ -0,0 +1,125 @@
+import multiprocessing as mp
+from collections import namedtuple
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+
+# ---------------------------
+# Shared-memory frame slots (zero-copy hand-off between threads / processes)
+# ---------------------------
+POOL_SLOTS = 4
+
+# What travels through queues instead of the pixels: a few ints, pickles in microseconds
+FrameHandle = namedtuple("FrameHandle", "slot seq shape")
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)   # Python 3.13+
+    except TypeError:
+        # Older Pythons register the attach too; spawned workers share the creator's
+        # resource tracker, so it is the same entry and only the creator unlinks it
+        return shared_memory.SharedMemory(name=name)
+
+class FramePool:
+    """Fixed number of uint8 frame slots in one shared-memory block.
+
+    put(frame) copies (or resizes) a frame into a free slot and returns a
+    FrameHandle with refcount 1; the holder passes the handle on instead of the
+    array and whoever ends up with it calls release(). view(handle) is a NumPy
+    view onto the slot (no copy); it returns None once the slot was recycled.
+    retain() adds a reference for a second consumer. When every slot is in use
+    put() returns None and the caller drops the frame.
+
+    The creating process owns the block (unlink()); other processes attach with
+    FramePool.attach(pool.spec()).
+    """
+    def __init__(self, slots=POOL_SLOTS, max_shape=(1080, 1920, 3), lock=None, _name=None):
+        self.slots = slots
+        self.max_shape = tuple(max_shape)
+        self.slot_bytes = int(np.prod(self.max_shape))
+        header = 2 * 8 * slots                          # int64 refcount + int64 seq per slot
+        self.offset = (header + 63) // 64 * 64
+        self.owner = _name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.offset + slots * self.slot_bytes)
+        else:
+            self.shm = _attach(_name)
+        self.lock = lock or mp.get_context("spawn").Lock()
+        meta = np.ndarray((2, slots), np.int64, self.shm.buf)
+        self.refs, self.seqs = meta[0], meta[1]
+        if self.owner:
+            meta[:] = 0
+
+    def spec(self):
+        return (self.shm.name, self.slots, self.max_shape, self.lock)
+
+    @classmethod
+    def attach(cls, spec):
+        name, slots, max_shape, lock = spec
+        return cls(slots, max_shape, lock=lock, _name=name)
+
+    def _slot_array(self, slot, shape):
+        start = self.offset + slot * self.slot_bytes
+        return np.ndarray(shape, np.uint8, self.shm.buf, offset=start)
+
+    def _acquire(self):
+        with self.lock:
+            free = np.flatnonzero(self.refs == 0)
+            if not len(free):
+                return None
+            slot = int(free[0])
+            self.refs[slot] = 1
+            self.seqs[slot] += 1
+            return slot, int(self.seqs[slot])
+
+    def put(self, frame, size=None):
+        """Copy frame into a free slot (resized to size=(w, h) on the way) -> FrameHandle or None."""
+        h, w = (size[1], size[0]) if size else frame.shape[:2]
+        shape = (h, w) + tuple(frame.shape[2:])
+        if int(np.prod(shape)) > self.slot_bytes:
+            raise ValueError(f"frame {shape} does not fit a {self.max_shape} slot")
+        got = self._acquire()
+        if got is None:
+            return None
+        slot, seq = got
+        dst = self._slot_array(slot, shape)
+        if size:
+            cv2.resize(frame, (w, h), dst=dst, interpolation=cv2.INTER_AREA)
+        else:
+            np.copyto(dst, frame)
+        return FrameHandle(slot, seq, shape)
+
+    def view(self, handle):
+        if self.seqs[handle.slot] != handle.seq or self.refs[handle.slot] <= 0:
+            return None
+        return self._slot_array(handle.slot, handle.shape)
+
+    def retain(self, handle):
+        with self.lock:
+            if self.seqs[handle.slot] == handle.seq and self.refs[handle.slot] > 0:
+                self.refs[handle.slot] += 1
+                return True
+            return False
+
+    def release(self, handle):
+        with self.lock:
+            if self.seqs[handle.slot] == handle.seq and self.refs[handle.slot] > 0:
+                self.refs[handle.slot] -= 1
+
+    def in_use(self):
+        with self.lock:
+            return int((self.refs > 0).sum())
+
+    def reset(self):
+        # A worker died while holding slots: nobody will release them any more
+        with self.lock:
+            self.refs[:] = 0
+
+    def close(self):
+        self.refs = self.seqs = None
+        self.shm.close()
+
+    def unlink(self):
+        self.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,136 @@
+import os
+import time
+import queue
+import atexit
+import threading
+import cv2
+from metrics import METRICS
+
+# ---------------------------
+# Background JPEG writer pool
+# ---------------------------
+WRITER_THREADS = 2
+WRITER_QUEUE = 64
+JPEG_QUALITY = 90
+PREVIEW_DIR = ".preview"    # saved_cars/x.jpg -> saved_cars/.preview/x.jpg
+PREVIEW_MAX = (500, 450)    # box of the preview variant (covers every preview label in the GUIs)
+PREVIEW_QUALITY = 85
+
+def preview_path(path):
+    folder, name = os.path.split(path)
+    return os.path.join(folder, PREVIEW_DIR, name)
+
+def write_preview(img, path, box=PREVIEW_MAX, quality=PREVIEW_QUALITY):
+    """Downscaled copy of img for the GUIs' thumbnails; None if img is already small."""
+    h, w = img.shape[:2]
+    scale = min(box[0] / w, box[1] / h)
+    out = preview_path(path)
+    if scale >= 1:
+        # A larger earlier shot at the same path may have left one behind
+        try:
+            os.remove(out)
+        except OSError:
+            pass
+        return None
+    small = cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    cv2.imwrite(out, small, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    return out
+
+class ImageWriter:
+    """Encodes and writes evidence images on worker threads.
+
+    save() only enqueues and returns the path that will be written. The queue is
+    bounded: when it is full save() blocks (block=True, the wait is counted in
+    `blocked_s`) or drops the image (block=False, counted in `dropped`).
+    The caller must not modify the array after handing it over (pass a copy
+    if the frame is drawn on later). With preview=True a small variant is also
+    written to PREVIEW_DIR for the GUIs' thumbnails.
+    """
+    def __init__(self, workers=WRITER_THREADS, max_queue=WRITER_QUEUE, jpeg_quality=JPEG_QUALITY,
+                 block=True, preview=False):
+        self.q = queue.Queue(maxsize=max_queue)
+        self.preview = preview
+        self.params = [int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality)]
+        self.block = block
+        self.lock = threading.Lock()
+        self.close_lock = threading.Lock()   # the closed check + enqueue vs. close()'s sentinels
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.blocked_s = 0.0
+        self.max_depth = 0
+        self.closed = False
+        self.threads = [threading.Thread(target=self._run, daemon=True) for _ in range(max(1, workers))]
+        for t in self.threads:
+            t.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            item = self.q.get()
+            if item is None:
+                self.q.task_done()
+                break
+            self._write(*item)
+            self.q.task_done()
+
+    def _write(self, img, path):
+        t0 = time.perf_counter()
+        try:
+            ok = cv2.imwrite(path, img, self.params)
+        except Exception:
+            ok = False
+        METRICS.observe("imwrite", time.perf_counter() - t0)
+        if ok and self.preview:
+            try: write_preview(img, path)
+            except Exception: pass
+        with self.lock:
+            if ok: self.written += 1
+            else: self.failed += 1
+
+    def save(self, img, path):
+        # Held across the enqueue, so nothing lands behind close()'s sentinels
+        with self.close_lock:
+            closed = self.closed
+            if not closed:
+                try:
+                    self.q.put_nowait((img, path))
+                except queue.Full:
+                    if not self.block:
+                        with self.lock: self.dropped += 1
+                        return None
+                    t0 = time.perf_counter()
+                    self.q.put((img, path))
+                    with self.lock: self.blocked_s += time.perf_counter() - t0
+        if closed:
+            # After close() the workers only drain what is queued: write on the caller's thread
+            self._write(img, path)
+            return path
+        depth = self.q.qsize()
+        METRICS.set("image_queue", depth)
+        with self.lock:
+            if depth > self.max_depth:
+                self.max_depth = depth
+        return path
+
+    def save_to(self, img, folder, name):
+        return self.save(img, os.path.join(folder, name))
+
+    def stats(self):
+        with self.lock:
+            return {"queued": self.q.qsize(), "max_depth": self.max_depth, "written": self.written,
+                    "failed": self.failed, "dropped": self.dropped, "blocked_s": round(self.blocked_s, 3)}
+
+    def flush(self):
+        self.q.join()
+
+    def close(self):
+        with self.close_lock:
+            if self.closed:
+                return
+            self.closed = True
+            for _ in self.threads:
+                self.q.put(None)
+        for t in self.threads:
+            t.join()
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+import numpy as np
+
+# ---------------------------
+# Live metrics: stage timers, rolling histograms, counters, gauges
+# ---------------------------
+WINDOW = 512              # samples kept per timer for the rolling quantiles
+RATE_WINDOW_S = 5.0       # rates (frames/s) are measured over this many seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+PREFIX = "plateocr"
+
+class _Timer:
+    __slots__ = ("samples", "buckets", "count", "total")
+
+    def __init__(self):
+        self.samples = deque(maxlen=WINDOW)
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+class Metrics:
+    """Thread-safe registry; every hot-path call is a lock plus a few appends.
+
+    observe(name, seconds) / with timer(name): stage latency (rolling p50/p95/p99 and
+    cumulative Prometheus buckets). inc(name, n): counter. set(name, value): gauge
+    (queue depths). tick(name, n): counter that also reports a rolling rate.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers = {}
+        self.counters = {}
+        self.gauges = {}
+        self.ticks = {}
+        self.started = time.monotonic()
+
+    def observe(self, name, seconds):
+        with self.lock:
+            t = self.timers.get(name)
+            if t is None:
+                t = self.timers[name] = _Timer()
+            t.samples.append(seconds)
+            t.buckets[bisect_left(BUCKETS, seconds)] += 1
+            t.count += 1
+            t.total += seconds
+
+    def timer(self, name):
+        return _Span(self, name)
+
+    def inc(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def set(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def tick(self, name, n=1):
+        now = time.monotonic()
+        with self.lock:
+            q = self.ticks.get(name)
+            if q is None:
+                q = self.ticks[name] = deque()
+            q.append((now, n))
+            while q and now - q[0][0] > RATE_WINDOW_S:
+                q.popleft()
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def rate(self, name):
+        now = time.monotonic()
+        with self.lock:
+            q = self.ticks.get(name)
+            if not q:
+                return 0.0
+            recent = [(t, n) for t, n in q if now - t <= RATE_WINDOW_S]
+            span = max(min(RATE_WINDOW_S, now - self.started), 1e-3)
+            return sum(n for _, n in recent) / span
+
+    def snapshot(self):
+        with self.lock:
+            timers = {}
+            for name, t in self.timers.items():
+                a = np.fromiter(t.samples, float) * 1000.0
+                timers[name] = {"count": t.count, "mean_ms": 1000.0 * t.total / t.count if t.count else 0.0,
+                                "p50_ms": float(np.percentile(a, 50)) if len(a) else 0.0,
+                                "p95_ms": float(np.percentile(a, 95)) if len(a) else 0.0,
+                                "p99_ms": float(np.percentile(a, 99)) if len(a) else 0.0}
+            counters, gauges = dict(self.counters), dict(self.gauges)
+            names = list(self.ticks)
+        rates = {name: self.rate(name) for name in names}
+        return {"time": time.time(), "uptime_s": time.monotonic() - self.started,
+                "rates": rates, "timers": timers, "counters": counters, "gauges": gauges}
+
+    def prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self.lock:
+            timers = {k: (list(t.buckets), t.count, t.total) for k, t in self.timers.items()}
+            counters, gauges = dict(self.counters), dict(self.gauges)
+        if timers:
+            lines += [f"# TYPE {PREFIX}_stage_seconds histogram"]
+            for name, (buckets, count, total) in timers.items():
+                acc = 0
+                for le, n in zip(BUCKETS, buckets):
+                    acc += n
+                    lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{name}",le="{le}"}} {acc}')
+                lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+                lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{name}"}} {total}')
+                lines.append(f'{PREFIX}_stage_seconds_count{{stage="{name}"}} {count}')
+        for name, v in counters.items():
+            lines += [f"# TYPE {PREFIX}_{name}_total counter", f"{PREFIX}_{name}_total {v}"]
+        for name, v in gauges.items():
+            lines += [f"# TYPE {PREFIX}_{name} gauge", f"{PREFIX}_{name} {v}"]
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self):
+        """Short human-readable lines for the overlay / Tk panel."""
+        snap = self.snapshot()
+        lines = [" ".join(f"{k} {v:.1f}/s" for k, v in snap["rates"].items())]
+        for name, t in snap["timers"].items():
+            lines.append(f"{name}: p50 {t['p50_ms']:.1f} p95 {t['p95_ms']:.1f} ms")
+        if snap["gauges"]:
+            lines.append(" ".join(f"{k}={v}" for k, v in snap["gauges"].items()))
+        return [l for l in lines if l]
+
+class _Span:
+    __slots__ = ("m", "name", "t0")
+
+    def __init__(self, m, name):
+        self.m = m
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.m.observe(self.name, time.perf_counter() - self.t0)
+        return False
+
+# Process-wide registry: writers, OCR and the frame loops all report here
+METRICS = Metrics()
+
+# ---------------------------
+# Exposition: overlay, snapshot file, HTTP endpoint
+# ---------------------------
+def draw_overlay(frame, metrics=METRICS, origin=(10, 20)):
+    x, y = origin
+    for line in metrics.summary_lines():
+        cv2.putText(frame, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 3)
+        cv2.putText(frame, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        y += 18
+    return frame
+
+class SnapshotWriter:
+    """Rewrites a .json or .prom file every `interval` seconds (for node-exporter textfile / scripts)."""
+    def __init__(self, path, metrics=METRICS, interval=5.0):
+        self.path = path
+        self.metrics = metrics
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self):
+        text = self.metrics.prometheus() if self.path.endswith(".prom") else json.dumps(self.metrics.snapshot(), indent=2)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, self.path)   # readers never see a half-written file
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.write()
+
+    def close(self):
+        self.stop_event.set()
+        self.write()
+
+def serve_http(port, metrics=METRICS, host="127.0.0.1"):
+    """GET /metrics (Prometheus text) and /metrics.json on a daemon thread; returns the server."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, ctype = json.dumps(metrics.snapshot()).encode(), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, ctype = metrics.prometheus().encode(), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# ---------------------------
+# Tk status panel
+# ---------------------------
+def metrics_panel(parent, metrics=METRICS, interval_ms=1000):
+    """A Label under `parent` that refreshes itself from the registry via after()."""
+    import tkinter as tk
+    label = tk.Label(parent, text="", justify=tk.LEFT, anchor="w", font=("Consolas", 9))
+
+    def refresh():
+        if not label.winfo_exists():
+            return
+        label.config(text="\n".join(metrics.summary_lines()))
+        label.after(interval_ms, refresh)
+
+    label.after(interval_ms, refresh)
+    return label
@@ -0,0 +1,85 @@
+import cv2
+import numpy as np
+
+# ---------------------------
+# Motion gate: skip the detectors while the scene does not change
+# ---------------------------
+GATE_WIDTH = 160          # frames are compared at this width
+GATE_GRID = (4, 4)        # rows, cols of activity regions
+GATE_DIFF = 25            # per-pixel grey difference that counts as change
+GATE_ACTIVITY = 0.02      # share of changed pixels in a region that wakes the pipeline
+GATE_HOLD = 15            # keep detecting this many frames after the last motion
+GATE_LEARN = 0.05         # background update rate (diff mode)
+
+class MotionGate:
+    """Cheap change detector in front of YOLO.
+
+    mode="diff": downscaled grey frame against a running-average background.
+    mode="mog2": OpenCV's MOG2 background subtractor on the downscaled frame.
+    check(frame) returns True when the detectors should run on this frame; it is
+    evaluated on the frame itself, so the pipeline wakes on the first moving frame.
+    `regions` holds the per-region activity of the last frame, `skip_ratio` the share
+    of frames that were skipped.
+    """
+    def __init__(self, mode="diff", width=GATE_WIDTH, grid=GATE_GRID, diff=GATE_DIFF,
+                 activity=GATE_ACTIVITY, hold=GATE_HOLD, learn=GATE_LEARN, mask=None):
+        self.mode = mode
+        self.width = width
+        self.grid = grid
+        self.diff = diff
+        self.activity = activity
+        self.hold = hold
+        self.learn = learn
+        self.mask = mask            # optional (rows, cols) bool array of regions to watch
+        self.bg = None
+        self.mog = cv2.createBackgroundSubtractorMOG2(history=300, varThreshold=16, detectShadows=False) \
+            if mode == "mog2" else None
+        self.regions = np.zeros(grid, np.float32)
+        self.idle_for = hold + 1    # start idle until the first motion (or the first frame)
+        self.woke = False
+        self.frames = 0
+        self.skipped = 0
+
+    def _small(self, frame):
+        h, w = frame.shape[:2]
+        size = (self.width, max(1, int(h * self.width / w)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3 and self.mode != "mog2":
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def _changed(self, small):
+        if self.mog is not None:
+            return self.mog.apply(small) > 0
+        if self.bg is None:
+            self.bg = small.astype(np.float32)
+            return np.ones(small.shape, bool)   # first frame: run once to seed the tracker
+        changed = cv2.absdiff(small, cv2.convertScaleAbs(self.bg)) > self.diff
+        cv2.accumulateWeighted(small, self.bg, self.learn)
+        return changed
+
+    def _region_scores(self, changed):
+        rows, cols = self.grid
+        h, w = changed.shape
+        hh, ww = h // rows * rows, w // cols * cols
+        cells = changed[:hh, :ww].reshape(rows, hh // rows, cols, ww // cols)
+        return cells.mean(axis=(1, 3)).astype(np.float32)
+
+    def check(self, frame):
+        self.frames += 1
+        changed = self._changed(self._small(frame))
+        self.regions = self._region_scores(changed)
+        scores = self.regions if self.mask is None else np.where(self.mask, self.regions, 0)
+        moving = bool((scores >= self.activity).any())
+
+        was_idle = self.idle_for > self.hold
+        self.idle_for = 0 if moving else self.idle_for + 1
+        active = self.idle_for <= self.hold
+        self.woke = moving and was_idle
+        if not active:
+            self.skipped += 1
+        return active
+
+    @property
+    def skip_ratio(self):
+        return self.skipped / self.frames if self.frames else 0.0
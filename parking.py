@@ -1,23 +1,33 @@
 import os
 import cv2
+import time
 import queue
 import threading
 import sqlite3
-import numpy as np
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 from datetime import datetime, date
-from ultralytics import YOLO
 from deep_sort_realtime.deepsort_tracker import DeepSort
 from fast_plate_ocr import LicensePlateRecognizer
-from PIL import Image, ImageTk
+from plate_ocr import PlateOCR
+from plate_memory import PlateMemory
+from image_writer import ImageWriter
+from thumbnails import ThumbnailCache
+from db_writer import DBWriter
+from association import associate
+from faces import BestFaces
+from metrics import METRICS, metrics_panel
 import csv
+from functools import partial
+from yolo_utils import deepsort_detections, result_arrays
+from detector_backend import load_detector
 
 # ---------------- Config ----------------
 VEHICLE_MODEL_PATH = "yolov8n-vehicle.pt"
 PLATE_MODEL_PATH = "license_plate_detector.pt"
 FACE_MODEL_PATH = "yolov8n_100e.pt"
 OCR_MODEL_NAME = "cct-xs-v1-global-model"
+DETECTOR_BACKEND = "torch"   # "torch" | "onnx" | "onnx-int8" (see detector_backend.py)
 
 DATA_DIR = "data_parking"
 SAVED_CARS = os.path.join(DATA_DIR, "cars")
@@ -31,17 +41,22 @@ os.makedirs(SAVED_FACES, exist_ok=True)
 os.makedirs(DATA_DIR, exist_ok=True)
 
 # ---------------- Load Models ----------------
-vehicle_model = YOLO(VEHICLE_MODEL_PATH)
-plate_model = YOLO(PLATE_MODEL_PATH)
-face_model = YOLO(FACE_MODEL_PATH)
+vehicle_model = load_detector(VEHICLE_MODEL_PATH, DETECTOR_BACKEND)
+plate_model = load_detector(PLATE_MODEL_PATH, DETECTOR_BACKEND)
+face_model = load_detector(FACE_MODEL_PATH, DETECTOR_BACKEND)
 ocr = LicensePlateRecognizer(OCR_MODEL_NAME)
+plate_ocr = PlateOCR(ocr)
+plate_memory = PlateMemory()
 tracker = DeepSort(max_age=30, n_init=3, nn_budget=100)
+image_writer = ImageWriter(preview=True)
+best_faces = BestFaces(image_writer, SAVED_FACES)
 
 # ---------------- Thread-safe queue ----------------
 result_queue = queue.Queue()
 
 # ---------------- Database ----------------
 conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+conn.execute("PRAGMA journal_mode=WAL")  # GUI/report reads do not block the writer thread
 cur = conn.cursor()
 
 cur.execute("""
@@ -80,30 +95,37 @@ CREATE TABLE IF NOT EXISTS parking_logs (
 """)
 conn.commit()
 
+# Writes from the video loop: one thread, batched transactions
+db_writer = DBWriter(DB_PATH)
+
 # ---------------- Utilities ----------------
-def bbox_to_ints(xy):
-    try:
-        coords = xy[0] if hasattr(xy[0], "__getitem__") else xy
-        a = coords.cpu().numpy() if hasattr(coords, "cpu") else np.array(coords)
-        x1, y1, x2, y2 = map(int, a.tolist())
-        return x1, y1, x2, y2
-    except Exception:
-        a = np.array(xy)
-        if a.size >= 4:
-            x1, y1, x2, y2 = map(int, a.flatten()[:4])
-            return x1, y1, x2, y2
-        raise
-
-def centroid(box):
-    x1, y1, x2, y2 = box
-    return ((x1+x2)/2, (y1+y2)/2)
+def log_parking(cur, plate_text, ts, car_path, plate_path, face_path):
+    # Runs on the DB writer thread
+    cur.execute("SELECT vehicle_id, owner_id FROM vehicles WHERE plate=?",(plate_text,))
+    row = cur.fetchone()
+    if row:
+        vehicle_id, user_id=row
+    else:
+        cur.execute("INSERT INTO vehicles (plate) VALUES (?)",(plate_text,))
+        vehicle_id, user_id = cur.lastrowid, None
+
+    # Check existing log
+    cur.execute("SELECT log_id FROM parking_logs WHERE vehicle_id=? AND status='in'", (vehicle_id,))
+    row = cur.fetchone()
+    if row:  # xe đang trong bãi, đánh dấu vẫn ở trong
+        cur.execute("UPDATE parking_logs SET car_image=?, plate_image=?, face_image=? WHERE log_id=?",
+                    (car_path, plate_path, face_path, row[0]))
+    else:  # xe mới vào
+        cur.execute("""INSERT INTO parking_logs
+                       (vehicle_id, user_id, in_time, status, car_image, plate_image, face_image)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                    (vehicle_id, user_id, ts, 'in', car_path, plate_path, face_path))
 
 def save_image(img, folder, prefix):
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"{prefix}_{ts}.jpg"
-    path = os.path.join(folder, filename)
-    cv2.imwrite(path, img)
-    return path
+    # Encoded and written in the background; the path is valid once the writer catches up
+    return image_writer.save(img, os.path.join(folder, filename))
 
 # ---------------- Tkinter GUI ----------------
 class ParkingApp:
@@ -126,6 +148,9 @@ class ParkingApp:
         self.btn_report = tk.Button(btn_frame, text="Báo cáo CSV hôm nay", command=self.export_csv)
         self.btn_report.pack(side=tk.LEFT, padx=6)
 
+        # Live stage timings / queue depths
+        metrics_panel(left_frame).pack(side=tk.BOTTOM, fill=tk.X, padx=6, pady=4)
+
         # Treeview
         columns = ("plate", "owner", "status", "in_time", "out_time")
         self.tree = ttk.Treeview(left_frame, columns=columns, show="headings", height=40)
@@ -161,6 +186,7 @@ class ParkingApp:
         self.cap = None
         self.current_video_path = None
         self.latest_entries = []
+        self.thumbs = ThumbnailCache()
         self.car_states = {}
 
         # Poll queue
@@ -224,17 +250,15 @@ class ParkingApp:
         self.show_preview(self.preview_car, item.get("car_path"), (400,200))
         self.show_preview(self.preview_plate, item.get("plate_path"), (400,150))
         self.show_preview(self.preview_face, item.get("face_path"), (400,150))
+        # Decode the rows around this one, so arrow-key browsing never waits on a JPEG
+        for i in (idx + 1, idx - 1):
+            if 0 <= i < len(self.latest_entries):
+                e = self.latest_entries[i]
+                self.thumbs.prefetch([(e.get("car_path"), (400,200)), (e.get("plate_path"), (400,150)),
+                                      (e.get("face_path"), (400,150))])
 
     def show_preview(self, label, path, size):
-        if path and os.path.exists(path):
-            im = Image.open(path)
-            im.thumbnail(size)
-            tkim = ImageTk.PhotoImage(im)
-            label.config(image=tkim, text="")
-            label.image = tkim
-        else:
-            label.config(image="", text="Không có ảnh")
-            label.image = None
+        self.thumbs.show(label, path, size, "Không có ảnh")
 
     # ---------------- CSV Report ----------------
     def export_csv(self):
@@ -264,37 +288,35 @@ class ParkingApp:
                 if not ret: break
 
                 # --- Vehicle detection ---
-                veh_results = vehicle_model(frame)[0]
-                detections = []
-                for box in veh_results.boxes:
-                    try: x1, y1, x2, y2 = bbox_to_ints(box.xyxy)
-                    except: x1, y1, x2, y2 = bbox_to_ints(box.xyxy[0])
-                    conf = float(box.conf[0]) if hasattr(box.conf,"__getitem__") else float(box.conf)
-                    if conf<0.25: continue
-                    detections.append(([x1, y1, x2-x1, y2-y1], conf, None))
+                t0 = time.perf_counter()
+                detections = deepsort_detections(vehicle_model(frame)[0], conf=0.25)
+                t_track = time.perf_counter()
+                METRICS.observe("vehicle", t_track - t0)
 
                 # --- Tracking ---
                 tracks = tracker.update_tracks(detections, frame=frame)
+                METRICS.observe("track", time.perf_counter() - t_track)
                 tracked_cars = [(t.track_id,*map(int,t.to_ltrb())) for t in tracks if t.is_confirmed()]
+                active_ids = {t.track_id for t in tracks}
+                plate_memory.evict(active_ids)
+                best_faces.evict(active_ids)
 
                 # --- Plate detection ---
-                plate_results = plate_model(frame)[0]
-                plate_bboxes = []
-                for box in plate_results.boxes:
-                    try: px1, py1, px2, py2 = bbox_to_ints(box.xyxy)
-                    except: px1, py1, px2, py2 = bbox_to_ints(box.xyxy[0])
-                    conf = float(box.conf[0]) if hasattr(box.conf,"__getitem__") else float(box.conf)
-                    if conf<0.25: continue
-                    plate_bboxes.append((px1, py1, px2, py2))
+                with METRICS.timer("plate"):
+                    xyxy, _, _ = result_arrays(plate_model(frame)[0], conf=0.25)
+                plate_bboxes = [tuple(b) for b in xyxy.tolist()]
 
                 # --- Match plates to cars ---
-                matches = []
-                for pb in plate_bboxes:
-                    pcx, pcy = centroid(pb)
-                    for car_id, x1, y1, x2, y2 in tracked_cars:
-                        if x1 <= pcx <= x2 and y1 <= pcy <= y2:
-                            matches.append((car_id, pb))
-                            break
+                # One plate per car, one car per plate (global assignment on plate-in-car overlap)
+                matches = associate(plate_bboxes, tracked_cars)
+
+                # --- Face detection ---
+                # One pass per FACE_STRIDE frames over the driver side of the plate-matched cars;
+                # each face goes to the car whose driver region contains it
+                if matches and best_faces.due():
+                    matched_ids = {c for c, _ in matches}
+                    with METRICS.timer("face"):
+                        best_faces.update(face_model, frame, [v for v in tracked_cars if v[0] in matched_ids])
 
                 frame_entries = []
                 for car_id, (px1, py1, px2, py2) in matches:
@@ -309,54 +331,23 @@ class ParkingApp:
                     plate_path=None
                     if plate_crop is not None and plate_crop.size>0:
                         plate_path = save_image(plate_crop, SAVED_PLATES, f"plate_{car_id}")
-                        try:
-                            plate_text_raw = ocr.run(cv2.cvtColor(plate_crop, cv2.COLOR_BGR2RGB))
-                            plate_text="".join(plate_text_raw) if isinstance(plate_text_raw,list) else plate_text_raw
-                        except: plate_text=None
+                        # Skip OCR once this track's plate is settled
+                        text, char_probs = plate_ocr.read_one(plate_crop) if plate_memory.needs_ocr(car_id) else (None, None)
+                        plate_text, _ = plate_memory.add(car_id, text, char_probs)
 
                     car_path = save_image(car_crop, SAVED_CARS, f"car_{car_id}")
 
-                    # --- Face detection ---
-                    face_path=None
-                    face_results = face_model(frame)[0]
-                    for f in face_results.boxes:
-                        try: fx1, fy1, fx2, fy2 = bbox_to_ints(f.xyxy)
-                        except: fx1, fy1, fx2, fy2 = bbox_to_ints(f.xyxy[0])
-                        face_crop = frame[fy1:fy2, fx1:fx2].copy()
-                        if face_crop.size>0:
-                            face_path = save_image(face_crop, SAVED_FACES, f"face_{car_id}")
-                            break
-
-                    # --- Update DB ---
-                    vehicle_id=None
-                    user_id=None
+                    # Best face seen so far for this track (None until one was found)
+                    face_path = best_faces.path(car_id)
+
+                    # --- Update DB (queued to the writer thread) ---
                     if plate_text:
-                        # Vehicle
-                        cur.execute("SELECT vehicle_id, owner_id FROM vehicles WHERE plate=?",(plate_text,))
-                        row = cur.fetchone()
-                        if row:
-                            vehicle_id, user_id=row
-                        else:
-                            cur.execute("INSERT INTO vehicles (plate) VALUES (?)",(plate_text,))
-                            vehicle_id = cur.lastrowid
-
-                        # Check existing log
-                        cur.execute("SELECT log_id, status FROM parking_logs WHERE vehicle_id=? AND status='in'", (vehicle_id,))
-                        row = cur.fetchone()
                         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        if row:  # xe đang trong bãi, đánh dấu vẫn ở trong
-                            log_id, status = row
-                            status='in'
-                            cur.execute("UPDATE parking_logs SET car_image=?, plate_image=?, face_image=? WHERE log_id=?",
-                                        (car_path, plate_path, face_path, log_id))
-                        else:  # xe mới vào
-                            status='in'
-                            cur.execute("""INSERT INTO parking_logs
-                                           (vehicle_id, user_id, in_time, status, car_image, plate_image, face_image)
-                                           VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                                        (vehicle_id, user_id, ts, status, car_path, plate_path, face_path))
-
-                        conn.commit()
+                        status='in'
+                        db_writer.submit(partial(log_parking, plate_text=plate_text, ts=ts, car_path=car_path,
+                                                 plate_path=plate_path, face_path=face_path))
+                        row = conn.execute("SELECT owner_id FROM vehicles WHERE plate=?",(plate_text,)).fetchone()
+                        user_id = row[0] if row else None
 
                         frame_entries.append({
                             "plate": plate_text,
@@ -370,6 +361,9 @@ class ParkingApp:
                         })
 
                 result_queue.put(frame_entries)
+                METRICS.observe("frame", time.perf_counter() - t0)
+                METRICS.tick("frames")
+                METRICS.set("result_queue", result_queue.qsize())
 
                 # --- Display frame ---
                 for car_id, x1, y1, x2, y2 in tracked_cars:
@@ -396,4 +390,5 @@ if __name__=="__main__":
     root=tk.Tk()
     app=ParkingApp(root)
     root.mainloop()
+    db_writer.close()
     conn.close()
@@ -11,7 +11,7 @@ import cv2
 from ultralytics import YOLO
 from deep_sort_realtime.deepsort_tracker import DeepSort
 from fast_plate_ocr import LicensePlateRecognizer
-import numpy as np
+from yolo_utils import deepsort_detections, result_arrays
 # ==========================
 # Config
 # ==========================
@@ -69,19 +69,6 @@ conn.commit()
 # ==========================
 # Utils
 # ==========================
-def bbox_to_ints(xy):
-    try:
-        coords = xy[0] if hasattr(xy[0], "__getitem__") else xy
-        a = coords.cpu().numpy() if hasattr(coords, "cpu") else np.array(coords)
-        x1, y1, x2, y2 = map(int, a.tolist())
-        return x1, y1, x2, y2
-    except Exception:
-        a = np.array(xy)
-        if a.size >= 4:
-            x1, y1, x2, y2 = map(int, a.flatten()[:4])
-            return x1, y1, x2, y2
-        raise
-
 def centroid(box):
     x1, y1, x2, y2 = box
     return ((x1+x2)/2, (y1+y2)/2)
@@ -280,24 +267,13 @@ class ParkingApp:
                 ret, frame = cap.read()
                 if not ret: break
                 # Vehicle detection
-                veh_results = vehicle_model(frame)[0]
-                detections = []
-                for box in veh_results.boxes:
-                    x1,y1,x2,y2 = bbox_to_ints(box.xyxy)
-                    conf = float(box.conf[0]) if hasattr(box.conf,"__getitem__") else float(box.conf)
-                    if conf<0.25: continue
-                    detections.append(([x1,y1,x2-x1,y2-y1], conf, None))
+                detections = deepsort_detections(vehicle_model(frame)[0], conf=0.25)
                 # Tracking
                 tracks = tracker.update_tracks(detections, frame=frame)
                 tracked_cars = [(t.track_id,*map(int,t.to_ltrb())) for t in tracks if t.is_confirmed()]
                 # Plate detection
-                plate_results = plate_model(frame)[0]
-                plate_bboxes = []
-                for box in plate_results.boxes:
-                    px1,py1,px2,py2 = bbox_to_ints(box.xyxy)
-                    conf = float(box.conf[0]) if hasattr(box.conf,"__getitem__") else float(box.conf)
-                    if conf<0.25: continue
-                    plate_bboxes.append((px1,py1,px2,py2))
+                xyxy, _, _ = result_arrays(plate_model(frame)[0], conf=0.25)
+                plate_bboxes = [tuple(b) for b in xyxy.tolist()]
                 # Match plates
                 matches = []
                 for pb in plate_bboxes:
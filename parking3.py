@@ -4,14 +4,13 @@ import shutil
 import queue
 import threading
 import sqlite3
-import numpy as np
 from datetime import datetime
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from PIL import Image, ImageTk
-from ultralytics import YOLO
 from deep_sort_realtime.deepsort_tracker import DeepSort
 from fast_plate_ocr import LicensePlateRecognizer
+from detector_backend import load_detector
 
 # ==========================
 # Config
@@ -20,6 +19,7 @@ VEHICLE_MODEL_GATE = "yolov8n-vehicle.pt"
 PLATE_MODEL = "license_plate_detector.pt"
 FACE_MODEL = "yolov8n_100e.pt"
 OCR_MODEL_NAME = "cct-xs-v1-global-model"
+DETECTOR_BACKEND = "torch"   # "torch" | "onnx" | "onnx-int8" (see detector_backend.py)
 
 SAVED_CARS = "saved_cars"
 SAVED_PLATES = "saved_plates"
@@ -30,10 +30,10 @@ os.makedirs(SAVED_CARS, exist_ok=True)
 os.makedirs(SAVED_PLATES, exist_ok=True)
 os.makedirs(SAVED_FACES, exist_ok=True)
 
-vehicle_model_gate = YOLO(VEHICLE_MODEL_GATE)
-vehicle_model_parking = YOLO(VEHICLE_MODEL_GATE)
-plate_model = YOLO(PLATE_MODEL)
-face_model = YOLO(FACE_MODEL)
+# One instance per set of weights, shared by the gate and parking loops
+vehicle_model = load_detector(VEHICLE_MODEL_GATE, DETECTOR_BACKEND)
+plate_model = load_detector(PLATE_MODEL, DETECTOR_BACKEND)
+face_model = load_detector(FACE_MODEL, DETECTOR_BACKEND)
 ocr = LicensePlateRecognizer(OCR_MODEL_NAME)
 tracker = DeepSort(max_age=30, n_init=3, nn_budget=100)
 result_queue_gate = queue.Queue()
@@ -85,19 +85,6 @@ conn.commit()
 # ==========================
 # Utils
 # ==========================
-def bbox_to_ints(xy):
-    try:
-        coords = xy[0] if hasattr(xy[0], "__getitem__") else xy
-        a = coords.cpu().numpy() if hasattr(coords, "cpu") else np.array(coords)
-        x1, y1, x2, y2 = map(int, a.tolist())
-        return x1, y1, x2, y2
-    except:
-        a = np.array(xy)
-        if a.size>=4:
-            x1, y1, x2, y2 = map(int,a.flatten()[:4])
-            return x1, y1, x2, y2
-        raise
-
 def centroid(box):
     x1, y1, x2, y2 = box
     return ((x1+x2)/2, (y1+y2)/2)
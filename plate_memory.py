@@ -0,0 +1,88 @@
+from collections import defaultdict, Counter
+
+# ---------------------------
+# Per-track plate memory
+# ---------------------------
+MIN_READS = 3        # readings before a consensus can lock
+STABLE_READS = 3     # consecutive unchanged consensus needed to lock
+MIN_AGREEMENT = 0.6  # mean per-position vote share needed to lock
+MAX_READS = 15       # lock anyway after this many readings
+
+class _TrackPlates:
+    def __init__(self):
+        self.reads = []          # [(text, [conf per char])]
+        self.consensus = None
+        self.agreement = 0.0
+        self.stable = 0
+        self.locked = False
+
+class PlateMemory:
+    """Accumulates OCR readings per track_id and votes per character position.
+
+    Once the consensus has been stable for a few readings the track is locked and
+    needs_ocr() returns False, so the plate is not read again while the track lives.
+    """
+    def __init__(self, min_reads=MIN_READS, stable_reads=STABLE_READS,
+                 min_agreement=MIN_AGREEMENT, max_reads=MAX_READS):
+        self.min_reads = min_reads
+        self.stable_reads = stable_reads
+        self.min_agreement = min_agreement
+        self.max_reads = max_reads
+        self.tracks = {}
+
+    def needs_ocr(self, track_id):
+        t = self.tracks.get(track_id)
+        return t is None or not t.locked
+
+    def is_locked(self, track_id):
+        t = self.tracks.get(track_id)
+        return t is not None and t.locked
+
+    def get(self, track_id):
+        t = self.tracks.get(track_id)
+        return t.consensus if t else None
+
+    def add(self, track_id, text, char_probs=None):
+        """Add one reading, return (consensus, locked)."""
+        t = self.tracks.setdefault(track_id, _TrackPlates())
+        if not text or t.locked:
+            return t.consensus, t.locked
+        confs = [1.0] * len(text) if char_probs is None else [float(c) for c in char_probs][:len(text)]
+        confs += [1.0] * (len(text) - len(confs))
+        t.reads.append((text, confs))
+
+        consensus, agreement = self._vote(t.reads)
+        t.stable = t.stable + 1 if consensus == t.consensus else 1
+        t.consensus, t.agreement = consensus, agreement
+        if len(t.reads) >= self.max_reads or (
+                len(t.reads) >= self.min_reads and t.stable >= self.stable_reads
+                and agreement >= self.min_agreement):
+            t.locked = True
+            t.reads = []  # keep only the result
+        return t.consensus, t.locked
+
+    def _vote(self, reads):
+        # Pick the plate length first (weighted by mean confidence), then vote each position
+        by_len = Counter()
+        for text, confs in reads:
+            by_len[len(text)] += sum(confs) / len(confs)
+        length = by_len.most_common(1)[0][0]
+        same = [(text, confs) for text, confs in reads if len(text) == length]
+
+        chars, shares = [], []
+        for i in range(length):
+            votes = defaultdict(float)
+            for text, confs in same:
+                votes[text[i]] += confs[i]
+            ch, score = max(votes.items(), key=lambda kv: kv[1])
+            chars.append(ch)
+            shares.append(score / (sum(votes.values()) or 1.0))
+        return "".join(chars), sum(shares) / length
+
+    def evict(self, active_ids):
+        """Forget tracks DeepSort no longer has; return {track_id: consensus} of dropped ones."""
+        active = set(active_ids)
+        dropped = {tid: t.consensus for tid, t in self.tracks.items() if tid not in active}
+        for tid in dropped:
+            del self.tracks[tid]
+        return dropped
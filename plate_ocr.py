@@ -0,0 +1,79 @@
+import time
+import cv2
+import numpy as np
+from metrics import METRICS
+
+# ---------------------------
+# Batched plate OCR
+# ---------------------------
+OCR_MAX_BATCH = 32
+PAD_CHAR = "_"
+
+def _split_output(raw, n):
+    """Normalize LicensePlateRecognizer.run output to [(text, char_probs)].
+
+    Newer fast-plate-ocr returns a list of PlatePrediction objects, older releases
+    return a list of strings or a (plates, probs) tuple when return_confidence=True.
+    """
+    if isinstance(raw, tuple) and len(raw) == 2:
+        plates, probs = raw
+        probs = np.asarray(probs)
+        return [(plates[i], probs[i]) for i in range(n)]
+    out = []
+    for p in raw:
+        if hasattr(p, "plate"):
+            out.append((p.plate, p.char_probs))
+        else:
+            out.append(("".join(p) if isinstance(p, list) else p, None))
+    return out
+
+def _clean(text, probs):
+    if not text:
+        return None, None
+    text = text.rstrip(PAD_CHAR)
+    if not text:
+        return None, None
+    if probs is not None:
+        probs = np.asarray(probs, dtype=np.float32)[:len(text)]
+    return text, probs
+
+class PlateOCR:
+    """Run the recognizer once for a whole list of BGR plate crops.
+
+    read() returns [(text, char_probs)] in input order; empty crops and failed
+    reads come back as (None, None).
+    """
+    def __init__(self, ocr, max_batch=OCR_MAX_BATCH):
+        self.ocr = ocr
+        self.max_batch = max_batch
+
+    def _run(self, images):
+        t0 = time.perf_counter()
+        try:
+            raw = self.ocr.run(images, return_confidence=True)
+        except TypeError:
+            # Old recognizer without return_confidence
+            raw = self.ocr.run(images)
+        METRICS.observe("ocr", time.perf_counter() - t0)
+        return _split_output(raw, len(images))
+
+    def read(self, crops):
+        results = [(None, None)] * len(crops)
+        idx = [i for i, c in enumerate(crops) if c is not None and c.size > 0]
+        for start in range(0, len(idx), self.max_batch):
+            chunk = idx[start:start + self.max_batch]
+            images = [cv2.cvtColor(crops[i], cv2.COLOR_BGR2RGB) for i in chunk]
+            try:
+                outs = self._run(images)
+            except Exception:
+                # One bad crop should not cost the whole batch: retry one by one
+                outs = []
+                for im in images:
+                    try: outs.append(self._run([im])[0])
+                    except Exception: outs.append((None, None))
+            for i, (text, probs) in zip(chunk, outs):
+                results[i] = _clean(text, probs)
+        return results
+
+    def read_one(self, crop):
+        return self.read([crop])[0]
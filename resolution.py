@@ -0,0 +1,71 @@
+# ---------------------------
+# Detector input size per model: fixed per camera, or adjusted at runtime
+# ---------------------------
+VEHICLE_IMGSZ = 640      # ultralytics default; 320-416 is usually enough for cars
+PLATE_IMGSZ = 640
+VEHICLE_MIN = 320        # dynamic mode never shrinks the vehicle detector below this
+PLATE_MAX = 1280         # ...nor grows the plate detector above this
+STEP = 32                # YOLO strides: sizes stay multiples of 32
+BIG_TRACK = 0.25         # a track this tall (fraction of frame height) should show its plate
+MISS_HIGH = 0.5          # share of big tracks without a plate that raises plate imgsz
+MISS_LOW = 0.2
+COOLDOWN = 15            # frames between two changes of the same model
+EMA = 0.2
+
+def snap(size):
+    return max(STEP, int(round(size / STEP)) * STEP)
+
+class ResolutionControl:
+    """Holds the imgsz each detector is called with.
+
+    With dynamic=True the vehicle detector drops one STEP when the per-frame
+    latency exceeds the frame budget (and climbs back to its base with headroom),
+    and the plate detector rises one STEP while large vehicle tracks keep coming
+    back without a plate (and returns to its base once plates are found again).
+    """
+    def __init__(self, vehicle_imgsz=VEHICLE_IMGSZ, plate_imgsz=PLATE_IMGSZ, dynamic=False, target_fps=25.0,
+                 vehicle_min=VEHICLE_MIN, plate_max=PLATE_MAX):
+        self.base_vehicle = self.vehicle_imgsz = snap(vehicle_imgsz)
+        self.base_plate = self.plate_imgsz = snap(plate_imgsz)
+        self.dynamic = dynamic
+        self.budget = 1.0 / target_fps if target_fps else 0.0
+        self.vehicle_min = min(snap(vehicle_min), self.base_vehicle)
+        self.plate_max = max(snap(plate_max), self.base_plate)
+        self.latency = None
+        self.miss = None
+        self.vehicle_wait = 0
+        self.plate_wait = 0
+
+    def update(self, frame_latency):
+        """Feed the measured average processing time per frame (seconds)."""
+        self.latency = frame_latency if self.latency is None else (1 - EMA) * self.latency + EMA * frame_latency
+        if not self.dynamic or not self.budget:
+            return
+        if self.vehicle_wait > 0:
+            self.vehicle_wait -= 1
+            return
+        if self.latency > self.budget and self.vehicle_imgsz > self.vehicle_min:
+            self.vehicle_imgsz -= STEP
+            self.vehicle_wait = COOLDOWN
+        elif self.latency < 0.7 * self.budget and self.vehicle_imgsz < self.base_vehicle:
+            self.vehicle_imgsz += STEP
+            self.vehicle_wait = COOLDOWN
+
+    def observe(self, tracked_cars, matched_ids, frame_height):
+        """Feed the confirmed tracks and plate-matched track ids of a detection frame."""
+        big = [car_id for car_id, _, y1, _, y2 in tracked_cars if y2 - y1 >= BIG_TRACK * frame_height]
+        if not big:
+            return
+        m = sum(1 for car_id in big if car_id not in matched_ids) / len(big)
+        self.miss = m if self.miss is None else (1 - EMA) * self.miss + EMA * m
+        if not self.dynamic:
+            return
+        if self.plate_wait > 0:
+            self.plate_wait -= 1
+            return
+        if self.miss > MISS_HIGH and self.plate_imgsz < self.plate_max:
+            self.plate_imgsz += STEP
+            self.plate_wait = COOLDOWN
+        elif self.miss < MISS_LOW and self.plate_imgsz > self.base_plate:
+            self.plate_imgsz -= STEP
+            self.plate_wait = COOLDOWN
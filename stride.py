@@ -0,0 +1,83 @@
+import math
+
+# ---------------------------
+# Detection stride: run YOLO every k frames, Kalman prediction in between
+# ---------------------------
+MIN_STRIDE = 1
+MAX_STRIDE = 6
+MOTION_LOW = 0.01    # mean track shift per frame, as a fraction of the box diagonal
+MOTION_HIGH = 0.05
+EMA = 0.2            # smoothing for latency / motion
+
+def predict_tracks(tracker):
+    """Advance DeepSort's Kalman filters one frame without detections.
+
+    update_tracks([]) would mark every track as missed and delete tentative ones,
+    so skipped frames only call predict().
+    """
+    tracker.tracker.predict()
+    return tracker.tracker.tracks
+
+class DetectionStride:
+    """Decides which frames go through the detectors.
+
+    With adaptive=True, k is raised when the average per-frame cost exceeds the
+    frame budget (1 / target_fps) or the scene is almost still, and lowered when
+    there is headroom and cars move fast.
+    """
+    def __init__(self, stride=1, adaptive=False, target_fps=25.0,
+                 min_stride=MIN_STRIDE, max_stride=MAX_STRIDE):
+        self.k = max(1, int(stride))
+        self.adaptive = adaptive
+        self.budget = 1.0 / target_fps if target_fps else 0.0
+        self.min_stride = min_stride
+        self.max_stride = max(max_stride, self.k)
+        self.count = 0
+        self.latency = None
+        self.motion = None
+        self.prev_centers = {}
+        self.last_observe = 0
+
+    def should_detect(self):
+        detect = self.count % self.k == 0
+        self.count += 1
+        return detect
+
+    def plan(self, n):
+        """What should_detect() would answer for the next n frames at the current k (no state change)."""
+        return [(self.count + i) % self.k == 0 for i in range(n)]
+
+    def observe(self, tracked_cars):
+        """Feed confirmed tracks of a detection frame to estimate scene motion."""
+        gap = max(1, self.count - self.last_observe)
+        self.last_observe = self.count
+        shifts, centers = [], {}
+        for car_id, x1, y1, x2, y2 in tracked_cars:
+            cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+            centers[car_id] = (cx, cy)
+            if car_id in self.prev_centers:
+                px, py = self.prev_centers[car_id]
+                diag = math.hypot(x2 - x1, y2 - y1) or 1.0
+                shifts.append(math.hypot(cx - px, cy - py) / diag / gap)
+        # A new car showed up: look more often until its motion is known
+        if self.adaptive and set(centers) - set(self.prev_centers):
+            self.k = max(self.min_stride, self.k // 2)
+        self.prev_centers = centers
+        if shifts:
+            m = sum(shifts) / len(shifts)
+            self.motion = m if self.motion is None else (1 - EMA) * self.motion + EMA * m
+        elif not tracked_cars:
+            self.motion = 0.0 if self.motion is None else (1 - EMA) * self.motion
+
+    def update(self, frame_latency):
+        """Feed the measured average processing time per frame (seconds)."""
+        self.latency = frame_latency if self.latency is None else (1 - EMA) * self.latency + EMA * frame_latency
+        # No motion estimate before the first observed detection frame: keep k as configured
+        if not self.adaptive or not self.budget or self.motion is None:
+            return self.k
+        motion = self.motion
+        if self.latency > self.budget or motion < MOTION_LOW:
+            self.k = min(self.max_stride, self.k + 1)
+        elif self.latency < 0.7 * self.budget and motion > MOTION_HIGH:
+            self.k = max(self.min_stride, self.k - 1)
+        return self.k
@@ -0,0 +1,123 @@
+import os
+import queue
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageTk
+from image_writer import preview_path
+
+# ---------------------------
+# Thumbnail cache for the GUIs' evidence previews
+# ---------------------------
+CACHE_BYTES = 64 * 1024 * 1024
+
+def load_thumbnail(path, size):
+    """PIL image fitted into `size`: from the saved preview when it is big enough, else a
+    draft-mode decode (JPEG DCT scaling, 1/2..1/8 of the pixels) of the original."""
+    with Image.open(path) as im:       # header only
+        w, h = im.size
+    fit = min(size[0] / w, size[1] / h, 1.0)
+    tw, th = max(1, int(w * fit)), max(1, int(h * fit))
+    src = path
+    small = preview_path(path)
+    # Only a preview at least as new as the original belongs to it
+    if fit < 1 and os.path.exists(small) and os.stat(small).st_mtime_ns >= os.stat(path).st_mtime_ns:
+        with Image.open(small) as im:
+            if im.width >= tw and im.height >= th:
+                src = small
+    with Image.open(src) as im:
+        im.draft("RGB", (tw, th))
+        im = im.convert("RGB")
+    im.thumbnail(size)
+    return im
+
+class ThumbnailCache:
+    """LRU of fitted preview images, bounded by decoded size.
+
+    get() returns a PhotoImage (Tk thread only); prefetch() decodes in the background
+    so the image is ready the moment a neighbouring row gets selected. Keys
+    include the file's mtime, so an image rewritten by a later best shot is reloaded.
+    The LRU holds only PIL images; PhotoImages live in `photos`, which only get()
+    touches, so Tk objects are never created or released off the Tk thread.
+    """
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()     # key -> [PIL image, bytes]
+        self.photos = {}               # key -> PhotoImage (Tk thread only), pruned to the LRU keys
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.q = queue.Queue()
+        self.hits = 0
+        self.misses = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _key(self, path, size):
+        try:
+            return path, tuple(size), os.stat(path).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+
+    def _put(self, key, im):
+        n = im.width * im.height * 3 * 2        # decoded pixels + the Tk copy
+        with self.lock:
+            if key in self.items:
+                return self.items[key]
+            entry = self.items[key] = [im, n]
+            self.bytes += n
+            while self.bytes > self.max_bytes and len(self.items) > 1:
+                _, old = self.items.popitem(last=False)
+                self.bytes -= old[1]
+            return entry
+
+    def _decode(self, path, size):
+        key = self._key(path, size)
+        if key is None:
+            return None, None
+        with self.lock:
+            entry = self.items.get(key)
+            if entry is not None:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return key, entry
+            self.misses += 1
+        try:
+            im = load_thumbnail(path, size)
+        except (OSError, ValueError):
+            return None, None
+        return key, self._put(key, im)
+
+    def get(self, path, size):
+        if not path:
+            return None
+        key, entry = self._decode(path, size)
+        if entry is None:
+            return None
+        photo = self.photos.get(key)
+        if photo is None:
+            photo = self.photos[key] = ImageTk.PhotoImage(entry[0])
+        # Drop the PhotoImages of evicted entries here, on the Tk thread
+        with self.lock:
+            stale = [k for k in self.photos if k != key and k not in self.items]
+        for k in stale:
+            del self.photos[k]
+        return photo
+
+    def prefetch(self, items):
+        """items: iterable of (path, size) to decode ahead, most wanted first."""
+        for path, size in items:
+            if path:
+                self.q.put((path, size))
+
+    def _run(self):
+        while True:
+            path, size = self.q.get()
+            self._decode(path, size)
+
+    def show(self, label, path, size, missing="Không có ảnh"):
+        tkim = self.get(path, size)
+        if tkim is None:
+            label.config(image="", text=missing)
+            label.image = None
+        else:
+            label.config(image=tkim, text="")
+            label.image = tkim
+        return tkim
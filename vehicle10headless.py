@@ -0,0 +1,450 @@
+import os
+import sys
+import time
+import argparse
+import cv2
+from datetime import datetime
+from deep_sort_realtime.deepsort_tracker import DeepSort
+from fast_plate_ocr import LicensePlateRecognizer
+from cascade import detect_plates_in_tracks
+from plate_ocr import PlateOCR
+from plate_memory import PlateMemory
+from stride import DetectionStride, predict_tracks
+from capture import FrameGrabber
+from image_writer import ImageWriter, JPEG_QUALITY, WRITER_THREADS
+from best_shot import BestShots, BEST_SHOT_TIMEOUT
+from db_writer import DBWriter
+from association import associate
+from motion_gate import MotionGate
+from zones import ZONES_FILE, load_camera, load_zones
+from resolution import ResolutionControl, VEHICLE_IMGSZ, PLATE_IMGSZ
+from detector_backend import load_detector, DETECTOR_BACKEND
+from yolo_utils import result_boxes, box_tuples
+from metrics import METRICS, SnapshotWriter, serve_http
+
+# ---------------------------
+# Config
+# ---------------------------
+VEHICLE_MODEL_PATH = "yolov8n-vehicle.pt"
+PLATE_MODEL_PATH = "license_plate_detector.pt"
+OCR_MODEL_NAME = "cct-xs-v1-global-model"
+
+SAVED_CARS = "saved_cars"
+SAVED_PLATES = "saved_plates"
+DB_PATH = "plates.db"
+
+CONF_THRESHOLD = 0.25
+BATCH_SIZE = 1      # frames per YOLO call
+MAX_WAIT = 0.1      # seconds to wait for a full batch on live sources
+STATIC_TIMEOUT = 300.0   # seconds a gated scene keeps its tracks frozen before they age out
+
+# ---------------------------
+# Database
+# ---------------------------
+PLATE_LOGS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS plate_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        car_id INTEGER,
+        plate TEXT UNIQUE,
+        car_path TEXT,
+        plate_path TEXT,
+        face_path TEXT,
+        timestamp TEXT
+    )
+"""
+
+# plate is UNIQUE: the first reading of a plate wins, as with the old SELECT-then-INSERT
+INSERT_PLATE_LOG = """INSERT OR IGNORE INTO plate_logs
+                          (car_id, plate, car_path, plate_path, face_path, timestamp)
+                      VALUES (?, ?, ?, ?, ?, ?)"""
+
+# ---------------------------
+# Pipeline (no GUI, no waitKey)
+# ---------------------------
+class HeadlessPipeline:
+    def __init__(self, db_path=DB_PATH, cars_dir=SAVED_CARS, plates_dir=SAVED_PLATES,
+                 conf=CONF_THRESHOLD, cascade=False, stride=1, adaptive_stride=False,
+                 jpeg_quality=JPEG_QUALITY, writer_threads=WRITER_THREADS,
+                 best_shot_timeout=BEST_SHOT_TIMEOUT, motion_gate=None, zones_file=None,
+                 backend=DETECTOR_BACKEND, ort_threads=None, vehicle_imgsz=VEHICLE_IMGSZ,
+                 plate_imgsz=PLATE_IMGSZ, dynamic_res=False, static_timeout=STATIC_TIMEOUT,
+                 models=None, tracker_factory=None):
+        self.cars_dir = cars_dir
+        self.plates_dir = plates_dir
+        self.conf = conf
+        self.cascade = cascade
+        self.stride_k = stride
+        self.adaptive_stride = adaptive_stride
+        self.best_shot_timeout = best_shot_timeout
+        self.motion_gate_mode = motion_gate
+        self.static_timeout = static_timeout
+        self.zones_file = zones_file
+        self.imgsz = {"vehicle": vehicle_imgsz, "plate": plate_imgsz}
+        self.dynamic_res = dynamic_res
+        os.makedirs(cars_dir, exist_ok=True)
+        os.makedirs(plates_dir, exist_ok=True)
+
+        # models={"vehicle": ..., "plate": ..., "ocr": ...} swaps in other backends (bench.py stubs)
+        models = models or {}
+        self.vehicle_model = models.get("vehicle") or load_detector(VEHICLE_MODEL_PATH, backend, threads=ort_threads)
+        self.plate_model = models.get("plate") or load_detector(PLATE_MODEL_PATH, backend, threads=ort_threads)
+        self.ocr = models.get("ocr") or LicensePlateRecognizer(OCR_MODEL_NAME)
+        self.tracker_factory = tracker_factory
+        self.plate_ocr = PlateOCR(self.ocr)
+        self.db = DBWriter(db_path, schema=[PLATE_LOGS_SCHEMA])
+        self.writer = ImageWriter(workers=writer_threads, jpeg_quality=jpeg_quality)
+        self.tracker = None
+        self.gate = None
+        self.zones = None
+        self.res = None
+        self.plate_memory = None
+        self.best_shots = None
+        self.tag = ""
+        self.stage_s = {}      # stage -> accumulated seconds (vehicle / plate / track / ocr)
+        self.batch_s = {}      # the same, for the batch being processed
+        self.lap_t = 0.0
+
+    def _lap(self, name):
+        # Book the time since the previous lap to `name`; track_and_match laps too
+        # (cascade plate detection), so every stage is measured where it runs
+        t = time.perf_counter()
+        self.batch_s[name] = self.batch_s.get(name, 0.0) + t - self.lap_t
+        self.lap_t = t
+
+    def reset(self, tag="", fps=25.0, source=None):
+        # New video -> new tracker, so track ids do not leak between files
+        self.tracker = self.tracker_factory() if self.tracker_factory else DeepSort(max_age=30, n_init=3, nn_budget=100)
+        self.stride = DetectionStride(self.stride_k, adaptive=self.adaptive_stride, target_fps=fps or 25.0)
+        self.plate_memory = PlateMemory()
+        self.gate = MotionGate(self.motion_gate_mode) if self.motion_gate_mode else None
+        # Per-camera ROI: the detectors only see the zones' bounding crop
+        self.zones = load_zones(source, self.zones_file) if self.zones_file and source is not None else None
+        # The same file may pin the detector input sizes of this camera
+        camera = load_camera(source, self.zones_file) if self.zones_file and source is not None else {}
+        imgsz = dict(self.imgsz, **camera.get("imgsz", {}))
+        self.res = ResolutionControl(imgsz["vehicle"], imgsz["plate"], dynamic=self.dynamic_res,
+                                     target_fps=fps or 25.0)
+        self.best_shots = BestShots(self.writer, self.cars_dir, self.plates_dir, self.best_shot_timeout)
+        self.active_ids = set()
+        self.last_paths = {}   # track_id -> (car_path, plate_path, ts) of the latest crop
+        self.logged = set()    # track_ids already written to plate_logs
+        self.last_tracks = []  # confirmed (car_id, x1, y1, x2, y2) of the last detected frame
+        self.static_since = None   # monotonic time the gate went quiet
+        self.tag = tag
+
+    def detect_batch(self, model, frames, imgsz):
+        # One forward pass for the whole list, results come back in frame order
+        if self.zones is None:
+            return [result_boxes(results, conf=self.conf)
+                    for results in model(list(frames), imgsz=imgsz, verbose=False)]
+        rois = [self.zones.crop(frame) for frame in frames]
+        results = model([roi for roi, _ in rois], imgsz=imgsz, verbose=False)
+        return [box_tuples(*self.zones.arrays(res, offset, conf=self.conf)[:2])
+                for res, (_, offset) in zip(results, rois)]
+
+    def process_batch(self, frames, first_idx):
+        t0 = self.lap_t = time.perf_counter()
+        self.batch_s = {}
+        # Only every k-th frame goes through the detectors, and only if something moved.
+        # The batch is detected up front for the frames the current k picks; the stride
+        # itself is still stepped per frame below, after the previous frame was tracked
+        moving, woke = [], []
+        for frame in frames:
+            moving.append(self.gate.check(self.zones.crop(frame)[0] if self.zones else frame) if self.gate else True)
+            woke.append(bool(self.gate and self.gate.woke))
+        plan = self.stride.plan(len(frames))
+        det_idx = [i for i in range(len(frames)) if plan[i] and moving[i] or woke[i]]
+        det_frames = [frames[i] for i in det_idx]
+        veh_batch, plate_batch = [None] * len(frames), [None] * len(frames)
+        self._lap("gate")
+        if det_frames:
+            for i, boxes in zip(det_idx, self.detect_batch(self.vehicle_model, det_frames,
+                                                                self.res.vehicle_imgsz)):
+                veh_batch[i] = boxes
+            self._lap("vehicle")
+            # In cascade mode plates are detected per frame, after tracking
+            if not self.cascade:
+                for i, boxes in zip(det_idx, self.detect_batch(self.plate_model, det_frames,
+                                                                    self.res.plate_imgsz)):
+                    plate_batch[i] = boxes
+                self._lap("plate")
+        # The tracker is stateful, so fan results out strictly in frame order
+        candidates = []
+        for i, frame in enumerate(frames):
+            detect = self.stride.should_detect() and moving[i] or woke[i]
+            veh_boxes, plate_boxes = (veh_batch[i], plate_batch[i]) if detect else (None, None)
+            if detect and veh_boxes is None:
+                # k dropped inside this batch (a new car showed up): this frame is due now
+                self._lap("track")
+                veh_boxes = self.detect_batch(self.vehicle_model, [frame], self.res.vehicle_imgsz)[0]
+                self._lap("vehicle")
+                if not self.cascade:
+                    plate_boxes = self.detect_batch(self.plate_model, [frame], self.res.plate_imgsz)[0]
+                    self._lap("plate")
+            candidates += self.track_and_match(frame, first_idx + i, veh_boxes, plate_boxes,
+                                               static=not detect and not moving[i])
+        self._lap("track")
+        # ...but OCR every plate crop of the whole window in one call
+        entries = self.recognize(candidates)
+        self._lap("ocr")
+        for name, seconds in self.batch_s.items():
+            self.stage_s[name] = self.stage_s.get(name, 0.0) + seconds
+            METRICS.observe(f"batch_{name}", seconds)
+        latency = (time.perf_counter() - t0) / len(frames)
+        METRICS.tick("frames", len(frames))
+        if self.gate:
+            METRICS.set("motion_skip_ratio", round(self.gate.skip_ratio, 4))
+        self.stride.update(latency)
+        self.res.update(latency)
+        per_frame = [[] for _ in frames]
+        for e in entries:
+            per_frame[e["frame_idx"] - first_idx].append(e)
+        return per_frame
+
+    def process(self, frame, frame_idx):
+        return self.process_batch([frame], frame_idx)[0]
+
+    def track_and_match(self, frame, frame_idx, veh_boxes, plate_boxes, static=False):
+        if not static:
+            self.static_since = None
+        # ---- Skipped frame: Kalman prediction only, nothing to match ----
+        if veh_boxes is None:
+            if static:
+                # Gated frame: freeze the tracker, so parked cars keep their ids (and their
+                # plate memory / best shots) through a quiet lot. Only a scene quiet for
+                # longer than static_timeout marks the tracks missed and lets them age out
+                now = time.monotonic()
+                if self.static_since is None:
+                    self.static_since = now
+                if now - self.static_since < self.static_timeout:
+                    return []
+                tracks = self.tracker.update_tracks([], frame=frame)
+            else:
+                tracks = predict_tracks(self.tracker)
+            self.active_ids = {t.track_id for t in tracks}
+            return []
+
+        # ---- Tracking ----
+        detections = [([x1, y1, x2 - x1, y2 - y1], conf, None) for x1, y1, x2, y2, conf in veh_boxes]
+        with METRICS.timer("track"):
+            tracks = self.tracker.update_tracks(detections, frame=frame)
+        tracked_cars = [(t.track_id, *map(int, t.to_ltrb())) for t in tracks if t.is_confirmed()]
+        self.active_ids = {t.track_id for t in tracks}
+        self.last_tracks = tracked_cars
+        self.stride.observe(tracked_cars)
+
+        # ---- Match plates to cars ----
+        matches = []
+        if self.cascade:
+            # Plates found inside a track crop already belong to that track
+            self._lap("track")
+            matches = [(car_id, pb) for car_id, pb, _ in
+                       detect_plates_in_tracks(self.plate_model, frame, tracked_cars, conf=self.conf,
+                                               max_imgsz=self.res.plate_imgsz)]
+            self._lap("plate")
+        else:
+            plate_bboxes = [(x1, y1, x2, y2) for x1, y1, x2, y2, _ in plate_boxes]
+            matches = associate(plate_bboxes, tracked_cars)
+        self.res.observe(tracked_cars, {car_id for car_id, _ in matches}, frame.shape[0])
+
+        # ---- Crops ----
+        candidates = []
+        h, w = frame.shape[:2]
+        for car_id, (px1, py1, px2, py2) in matches:
+            vb = next((v for v in tracked_cars if v[0] == car_id), None)
+            if vb is None: continue
+            _, vx1, vy1, vx2, vy2 = vb
+            vx1, vy1, vx2, vy2 = max(0, vx1), max(0, vy1), min(w, vx2), min(h, vy2)
+            px1, py1, px2, py2 = max(0, px1), max(0, py1), min(w, px2), min(h, py2)
+            if vx2 <= vx1 or vy2 <= vy1 or px2 <= px1 or py2 <= py1: continue
+            candidates.append({"car_id": car_id, "frame_idx": frame_idx,
+                               "car_crop": frame[vy1:vy2, vx1:vx2],
+                               "plate_crop": frame[py1:py2, px1:px2]})
+        return candidates
+
+    def recognize(self, candidates):
+        # ---- OCR (batched) only for tracks whose plate is not settled yet ----
+        todo = [c for c in candidates if self.plate_memory.needs_ocr(c["car_id"])]
+        for c, (text, char_probs) in zip(todo, self.plate_ocr.read([c["plate_crop"] for c in todo])):
+            c["read"] = (text, char_probs)
+
+        entries = []
+        for c in candidates:
+            car_id, frame_idx = c["car_id"], c["frame_idx"]
+            text, char_probs = c.get("read", (None, None))
+            plate_text, locked = self.plate_memory.add(car_id, text, char_probs)
+            if not plate_text: continue
+
+            # Keep the crop only if it beats this track's best shot so far
+            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.best_shots.offer(car_id, c["car_crop"], c["plate_crop"], char_probs, tag=self.tag)
+            car_path, plate_path = self.best_shots.paths(car_id)
+            self.last_paths[car_id] = (car_path, plate_path, ts)
+
+            if locked and car_id not in self.logged:
+                self.log_plate(car_id, plate_text)
+            entries.append({"car_id": car_id, "frame_idx": frame_idx, "plate_text": plate_text,
+                            "char_probs": char_probs, "car_path": car_path,
+                            "plate_path": plate_path, "ts": ts})
+
+        # ---- Tracks DeepSort dropped: log their best guess, free the memory ----
+        for car_id, plate_text in self.plate_memory.evict(self.active_ids).items():
+            if plate_text and car_id not in self.logged:
+                self.log_plate(car_id, plate_text)
+            self.logged.discard(car_id)
+            self.last_paths.pop(car_id, None)
+        # Ended tracks get their best shot written, long-lived ones after the timeout
+        self.best_shots.expire(self.active_ids)
+        return entries
+
+    def log_plate(self, car_id, plate_text):
+        car_path, plate_path, ts = self.last_paths.get(car_id, (None, None, None))
+        ts = ts or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.db.execute(INSERT_PLATE_LOG, (car_id, plate_text, car_path, plate_path, None, ts))
+        self.logged.add(car_id)
+
+    def flush(self):
+        # End of a video: every remaining track counts as dropped
+        if self.plate_memory is not None:
+            self.active_ids = set()
+            self.recognize([])
+
+    def close(self):
+        if self.best_shots is not None:
+            self.best_shots.finish_all()
+        self.writer.close()
+        print(f"Image writer: {self.writer.stats()}")
+        self.db.close()
+        print(f"DB writer: {self.db.stats()}")
+
+# ---------------------------
+# Runner
+# ---------------------------
+def read_batch(cap, batch_size, max_wait=None):
+    """Read up to batch_size frames; stop early once max_wait seconds have passed (live sources)."""
+    frames = []
+    t0 = time.monotonic()
+    while len(frames) < batch_size:
+        ret, frame = cap.read()
+        if not ret: break
+        frames.append(frame)
+        if max_wait is not None and time.monotonic() - t0 >= max_wait: break
+    return frames
+
+def is_live(path):
+    return str(path).isdigit() or "://" in str(path)
+
+def open_source(path):
+    # "0", "1", ... = camera index, anything else = file / stream URL
+    cap = cv2.VideoCapture(int(path)) if str(path).isdigit() else cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return cap
+    # Live sources keep only the newest frame, files are decoded ahead without loss
+    return FrameGrabber(cap, lossless=not is_live(path))
+
+def run_video(pipeline, path, max_frames=0, batch_size=BATCH_SIZE, max_wait=None):
+    cap = open_source(path)
+    if not cap.isOpened():
+        print(f"[!] Không mở được file: {path}", file=sys.stderr)
+        return 0, 0.0
+    pipeline.reset(tag=os.path.splitext(os.path.basename(path))[0], fps=cap.get(cv2.CAP_PROP_FPS),
+                   source=path)
+
+    frames = 0
+    t0 = time.perf_counter()
+    try:
+        while True:
+            n = batch_size if not max_frames else min(batch_size, max_frames - frames)
+            batch = read_batch(cap, n, max_wait)
+            if not batch: break
+            pipeline.process_batch(batch, frames)
+            frames += len(batch)
+            if max_frames and frames >= max_frames: break
+    finally:
+        cap.release()
+        pipeline.flush()
+    elapsed = time.perf_counter() - t0
+    fps = frames / elapsed if elapsed > 0 else 0.0
+    print(f"{path}: {frames} frames in {elapsed:.1f}s ({fps:.2f} frames/s, detection stride {pipeline.stride.k}, "
+          f"imgsz vehicle {pipeline.res.vehicle_imgsz} / plate {pipeline.res.plate_imgsz})")
+    if pipeline.zones:
+        x1, y1, x2, y2 = pipeline.zones.bounds or (0, 0, 0, 0)
+        print(f"  zones: {len(pipeline.zones.polygons)} polygon(s), detector input {x2 - x1}x{y2 - y1}")
+    if pipeline.gate:
+        print(f"  motion gate skipped {pipeline.gate.skip_ratio:.1%} of frames")
+    if is_live(path):
+        print(f"  dropped {cap.dropped} stale frames of {cap.grabbed} captured")
+    return frames, elapsed
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Headless vehicle + plate OCR for recorded videos")
+    ap.add_argument("videos", nargs="+", help="video files to process (or a camera index)")
+    ap.add_argument("--db", default=DB_PATH, help="sqlite database with plate_logs")
+    ap.add_argument("--cars-dir", default=SAVED_CARS)
+    ap.add_argument("--plates-dir", default=SAVED_PLATES)
+    ap.add_argument("--conf", type=float, default=CONF_THRESHOLD, help="detector confidence threshold")
+    ap.add_argument("--max-frames", type=int, default=0, help="stop each video after N frames (0 = all)")
+    ap.add_argument("--batch", type=int, default=BATCH_SIZE, help="frames per detector call")
+    ap.add_argument("--max-wait", type=float, default=None,
+                    help=f"max seconds to gather a batch (live sources, e.g. {MAX_WAIT})")
+    ap.add_argument("--cascade", action="store_true",
+                    help="run the plate detector only on crops of confirmed vehicle tracks")
+    ap.add_argument("--stride", type=int, default=1, help="run the detectors every k frames")
+    ap.add_argument("--adaptive-stride", action="store_true",
+                    help="adjust the stride from frame latency and scene motion")
+    ap.add_argument("--motion-gate", choices=["diff", "mog2"], default=None,
+                    help="skip the detectors while the scene is static")
+    ap.add_argument("--static-timeout", type=float, default=STATIC_TIMEOUT,
+                    help="seconds of gated (static) scene before its tracks age out")
+    ap.add_argument("--zones", nargs="?", const=ZONES_FILE, default=None,
+                    help=f"crop inference to the per-camera ROI polygons in this file (default {ZONES_FILE})")
+    ap.add_argument("--backend", choices=["torch", "onnx", "onnx-int8"], default=DETECTOR_BACKEND,
+                    help="detector runtime (onnx models are exported/quantized on first use)")
+    ap.add_argument("--ort-threads", type=int, default=None, help="onnxruntime intra-op threads")
+    ap.add_argument("--vehicle-imgsz", type=int, default=VEHICLE_IMGSZ, help="vehicle detector input size")
+    ap.add_argument("--plate-imgsz", type=int, default=PLATE_IMGSZ, help="plate detector input size")
+    ap.add_argument("--dynamic-res", action="store_true",
+                    help="shrink the vehicle detector under load, grow the plate detector when plates are missed")
+    ap.add_argument("--jpeg-quality", type=int, default=JPEG_QUALITY)
+    ap.add_argument("--best-shot-timeout", type=float, default=BEST_SHOT_TIMEOUT,
+                    help="seconds before a long-lived track's best shot is written")
+    ap.add_argument("--writer-threads", type=int, default=WRITER_THREADS, help="background JPEG writers")
+    ap.add_argument("--metrics-port", type=int, default=None,
+                    help="serve /metrics (Prometheus text) and /metrics.json on 127.0.0.1:PORT")
+    ap.add_argument("--metrics-file", default=None,
+                    help="rewrite a metrics snapshot every few seconds (.prom = Prometheus text, else JSON)")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    pipeline = HeadlessPipeline(db_path=args.db, cars_dir=args.cars_dir,
+                                plates_dir=args.plates_dir, conf=args.conf,
+                                cascade=args.cascade, stride=max(1, args.stride),
+                                adaptive_stride=args.adaptive_stride,
+                                jpeg_quality=args.jpeg_quality, writer_threads=args.writer_threads,
+                                best_shot_timeout=args.best_shot_timeout, motion_gate=args.motion_gate,
+                                static_timeout=args.static_timeout,
+                                zones_file=args.zones, backend=args.backend, ort_threads=args.ort_threads,
+                                vehicle_imgsz=args.vehicle_imgsz, plate_imgsz=args.plate_imgsz,
+                                dynamic_res=args.dynamic_res)
+    server = serve_http(args.metrics_port) if args.metrics_port else None
+    snapshots = SnapshotWriter(args.metrics_file) if args.metrics_file else None
+    total_frames, total_time = 0, 0.0
+    try:
+        for path in args.videos:
+            frames, elapsed = run_video(pipeline, path, args.max_frames,
+                                        batch_size=max(1, args.batch), max_wait=args.max_wait)
+            total_frames += frames
+            total_time += elapsed
+    except KeyboardInterrupt:
+        print("Interrupted")
+    finally:
+        pipeline.close()
+        if snapshots: snapshots.close()
+        if server: server.shutdown()
+    fps = total_frames / total_time if total_time > 0 else 0.0
+    print(f"Total: {total_frames} frames in {total_time:.1f}s ({fps:.2f} frames/s)")
+
+# ---------------------------
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import sys
+import cv2
+import tkinter as tk
+from tkinter import filedialog, ttk
+from PIL import Image, ImageTk
+from camera_supervisor import CameraSupervisor
+from zones import ZONES_FILE
+
+# ---------------------------
+# Config
+# ---------------------------
+DB_PATH = "plates.db"
+GRID_COLS = 3             # preview tiles per row
+POLL_MS = 100
+MAX_ROWS = 500            # recognition rows kept in the table
+
+# ---------------------------
+# GUI: one worker process per camera, this process only draws
+# ---------------------------
+class MultiCamApp:
+    def __init__(self, root, sources, supervisor):
+        self.root = root
+        self.sup = supervisor
+        root.title("Vehicle + Plate OCR (multi camera)")
+        root.geometry("1600x900")
+
+        left_frame = tk.Frame(root, width=420)
+        left_frame.pack(side=tk.LEFT, fill=tk.Y)
+        self.lbl_status = tk.Label(left_frame, text="", justify=tk.LEFT, anchor="w")
+        self.lbl_status.pack(fill=tk.X, padx=6, pady=6)
+
+        columns = ("cam", "car_id", "plate", "time")
+        self.tree = ttk.Treeview(left_frame, columns=columns, show="headings", height=40)
+        for col, text, width in (("cam", "Cam", 50), ("car_id", "Car ID", 70),
+                                 ("plate", "Plate", 120), ("time", "Time", 140)):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width)
+        self.tree.pack(fill=tk.Y, expand=True, pady=6)
+
+        grid = tk.Frame(root)
+        grid.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tiles = {}
+        for cam_id, source in enumerate(sources):
+            tile = tk.Label(grid, text=f"Cam {cam_id}: {source}", relief=tk.SUNKEN, compound=tk.TOP)
+            tile.grid(row=cam_id // GRID_COLS, column=cam_id % GRID_COLS, padx=2, pady=2, sticky="nsew")
+            self.tiles[cam_id] = tile
+        self.rows = {}   # (cam_id, car_id) -> tree item
+
+        self.sup.start_all(sources)
+        root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(POLL_MS, self.poll)
+
+    def poll(self):
+        events, previews = self.sup.poll()
+        for kind, cam_id, payload in events:
+            if kind == "plate":
+                self.on_plate(cam_id, payload)
+            elif kind in ("error", "restart"):
+                print(f"[cam {cam_id}] {kind}: {payload}", file=sys.stderr)
+        for cam_id, handle in previews.items():
+            # View onto the worker's shared slot; the colour conversion is the only copy
+            frame = self.sup.view(cam_id, handle)
+            if frame is not None:
+                tkim = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+                self.tiles[cam_id].config(image=tkim)
+                self.tiles[cam_id].image = tkim
+            self.sup.release(cam_id, handle)
+        status = self.sup.status()
+        self.lbl_status.config(text="\n".join(
+            f"Cam {cam_id}: {'chạy' if s['alive'] else 'dừng'}, restart {s['restarts']}, CPU {s['cpus']}"
+            for cam_id, s in status.items()))
+        self.root.after(POLL_MS, self.poll)
+
+    def on_plate(self, cam_id, e):
+        key = (cam_id, e["car_id"])
+        values = (cam_id, e["car_id"], e["plate_text"], e["ts"])
+        if key in self.rows:
+            self.tree.item(self.rows[key], values=values)
+            return
+        self.rows[key] = self.tree.insert("", 0, values=values)
+        if len(self.rows) > MAX_ROWS:
+            oldest = self.tree.get_children()[-1]
+            self.tree.delete(oldest)
+            self.rows = {k: v for k, v in self.rows.items() if v != oldest}
+
+    def on_close(self):
+        self.sup.stop_all()
+        self.root.destroy()
+
+if __name__ == "__main__":
+    # python vehicle11multicam.py cam0.mp4 rtsp://... 0
+    root = tk.Tk()
+    sources = sys.argv[1:]
+    if not sources:
+        root.withdraw()
+        sources = list(filedialog.askopenfilenames(title="Chọn video",
+                                                    filetypes=[("Video files", "*.mp4 *.avi *.mov *.mkv")]))
+        root.deiconify()
+    if sources:
+        supervisor = CameraSupervisor(pipeline_opts={"db_path": DB_PATH, "zones_file": ZONES_FILE})
+        MultiCamApp(root, sources, supervisor)
+        root.mainloop()
@@ -7,6 +7,8 @@ from ultralytics import YOLO
 from deep_sort_realtime.deepsort_tracker import DeepSort
 from fast_plate_ocr import LicensePlateRecognizer
 import sqlite3
+from association import associate
+from yolo_utils import deepsort_detections, result_arrays
 
 # ============================
 # DATABASE
@@ -33,21 +35,6 @@ plate_model = YOLO("license_plate_detector.pt")
 ocr = LicensePlateRecognizer("cct-xs-v1-global-model")
 tracker = DeepSort(max_age=30, n_init=3, nn_budget=100)
 
-# ============================
-# UTILS
-# ============================
-def iou(boxA, boxB):
-    xA = max(boxA[0], boxB[0])
-    yA = max(boxA[1], boxB[1])
-    xB = min(boxA[2], boxB[2])
-    yB = min(boxA[3], boxB[3])
-    interArea = max(0, xB - xA) * max(0, yB - yA)
-    if interArea == 0:
-        return 0
-    boxAArea = (boxA[2] - boxA[0]) * (boxA[3] - boxA[1])
-    boxBArea = (boxB[2] - boxB[0]) * (boxB[3] - boxB[1])
-    return interArea / float(boxAArea + boxBArea - interArea)
-
 # ============================
 # RUN VIDEO / CAMERA
 # ============================
@@ -76,17 +63,9 @@ def run_camera_or_video():
         # 1) YOLO detect xe
         # ======================
         veh_res = vehicle_model(frame)[0]
-        detections = []
+        detections = deepsort_detections(veh_res, conf=0.5, classes=(2,3,5,7))
         tracked_cars = []
 
-        for box in veh_res.boxes:
-            cls = int(box.cls[0])
-            conf = float(box.conf[0])
-            if conf < 0.5 or cls not in [2,3,5,7]:
-                continue
-            x1,y1,x2,y2 = map(int, box.xyxy[0])
-            detections.append(([x1,y1,x2-x1,y2-y1], conf, None))
-
         tracks = tracker.update_tracks(detections, frame=frame)
         for t in tracks:
             if not t.is_confirmed():
@@ -102,12 +81,9 @@ def run_camera_or_video():
         # 2) YOLO detect biển số
         # ======================
         plate_res = plate_model(frame)[0]
+        plate_xyxy, _, _ = result_arrays(plate_res, conf=0.5)
         plate_boxes = []
-        for box in plate_res.boxes:
-            conf = float(box.conf[0])
-            if conf < 0.5:
-                continue
-            x1,y1,x2,y2 = map(int, box.xyxy[0])
+        for x1,y1,x2,y2 in plate_xyxy.tolist():
             plate_boxes.append((x1,y1,x2,y2))
             cv2.rectangle(frame,(x1,y1),(x2,y2),(255,0,0),2)
             cv2.putText(frame,"Plate",(x1,y1-5),cv2.FONT_HERSHEY_SIMPLEX,0.6,(255,0,0),2)
@@ -115,17 +91,7 @@ def run_camera_or_video():
         # ======================
         # 3) Match biển số ↔ xe
         # ======================
-        matches = []
-        for px1,py1,px2,py2 in plate_boxes:
-            best_iou = 0
-            best_car = None
-            for car_id,x1,y1,x2,y2 in tracked_cars:
-                iou_val = iou((px1,py1,px2,py2),(x1,y1,x2,y2))
-                if iou_val>best_iou:
-                    best_iou=iou_val
-                    best_car=(car_id,(px1,py1,px2,py2))
-            if best_car and best_iou>0.1:
-                matches.append(best_car)
+        matches = associate(plate_boxes, tracked_cars, mode="iou", min_score=0.1)
 
         # ======================
         # 4) OCR + lưu database
@@ -4,13 +4,13 @@ import time
 import queue
 import threading
 import sqlite3
-import numpy as np
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 from datetime import datetime
 from ultralytics import YOLO
 from deep_sort_realtime.deepsort_tracker import DeepSort
 from fast_plate_ocr import LicensePlateRecognizer
+from yolo_utils import bbox_to_ints
 
 # ---------------------------
 # Config (thay đường dẫn model nếu cần)
@@ -46,28 +46,6 @@ result_queue = queue.Queue()
 # ---------------------------
 # Utility functions
 # ---------------------------
-def bbox_to_ints(xy):
-    """
-    Trả về tuple (x1,y1,x2,y2) int từ box.xyxy[0] object.
-    Hỗ trợ tensor hoặc list.
-    """
-    try:
-        coords = xy[0]
-        # If torch tensor
-        if hasattr(coords, "cpu"):
-            a = coords.cpu().numpy()
-        else:
-            a = np.array(coords)
-        x1, y1, x2, y2 = map(int, a.tolist())
-        return x1, y1, x2, y2
-    except Exception:
-        # fallback: try convert directly
-        a = np.array(xy)
-        if a.size >= 4:
-            x1, y1, x2, y2 = map(int, a.flatten()[:4])
-            return x1, y1, x2, y2
-        raise
-
 def centroid(box):
     x1,y1,x2,y2 = box
     return ((x1+x2)/2, (y1+y2)/2)
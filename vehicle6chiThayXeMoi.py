@@ -3,7 +3,6 @@ import cv2
 import queue
 import threading
 import sqlite3
-import numpy as np
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 from datetime import datetime
@@ -11,6 +10,9 @@ from ultralytics import YOLO
 from deep_sort_realtime.deepsort_tracker import DeepSort
 from fast_plate_ocr import LicensePlateRecognizer
 from PIL import Image, ImageTk
+from yolo_utils import bbox_to_ints
+from plate_ocr import PlateOCR
+from plate_memory import PlateMemory
 
 # ---------------------------
 # Config
@@ -30,6 +32,8 @@ os.makedirs(SAVED_PLATES, exist_ok=True)
 vehicle_model = YOLO(VEHICLE_MODEL_PATH)
 plate_model = YOLO(PLATE_MODEL_PATH)
 ocr = LicensePlateRecognizer(OCR_MODEL_NAME)
+plate_ocr = PlateOCR(ocr)
+plate_memory = PlateMemory()
 tracker = DeepSort(max_age=30, n_init=3, nn_budget=100)
 
 # Thread-safe queue
@@ -38,19 +42,6 @@ result_queue = queue.Queue()
 # ---------------------------
 # Utils
 # ---------------------------
-def bbox_to_ints(xy):
-    try:
-        coords = xy[0] if hasattr(xy[0], "__getitem__") else xy
-        a = coords.cpu().numpy() if hasattr(coords, "cpu") else np.array(coords)
-        x1, y1, x2, y2 = map(int, a.tolist())
-        return x1, y1, x2, y2
-    except Exception:
-        a = np.array(xy)
-        if a.size >= 4:
-            x1, y1, x2, y2 = map(int, a.flatten()[:4])
-            return x1, y1, x2, y2
-        raise
-
 def centroid(box):
     x1,y1,x2,y2 = box
     return ((x1+x2)/2, (y1+y2)/2)
@@ -284,6 +275,7 @@ class App:
                     tracked_cars.append((tid,x1,y1,x2,y2))
                     cv2.rectangle(frame,(x1,y1),(x2,y2),(0,255,0),2)
                     cv2.putText(frame,f"ID:{tid}",(x1,max(12,y1-6)),cv2.FONT_HERSHEY_SIMPLEX,0.6,(0,255,0),2)
+                plate_memory.evict({t.track_id for t in tracks})
 
                 # 3) Detect plates
                 plate_results = plate_model(frame)[0]
@@ -328,11 +320,9 @@ class App:
                         plate_filename=f"plate_{car_id}_{ts}.jpg"
                         plate_path=os.path.join(SAVED_PLATES,plate_filename)
                         cv2.imwrite(plate_path, plate_crop)
-                        try:
-                            plate_text_raw = ocr.run(cv2.cvtColor(plate_crop, cv2.COLOR_BGR2RGB))
-                            plate_text = "".join(plate_text_raw) if isinstance(plate_text_raw,list) else plate_text_raw
-                        except:
-                            plate_text=None
+                        # Skip OCR once this track's plate is settled
+                        text, char_probs = plate_ocr.read_one(plate_crop) if plate_memory.needs_ocr(car_id) else (None, None)
+                        plate_text, _ = plate_memory.add(car_id, text, char_probs)
 
                     # Save DB
                     try:
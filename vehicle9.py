@@ -3,7 +3,6 @@ import cv2
 import queue
 import threading
 import sqlite3
-import numpy as np
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 from datetime import datetime
@@ -11,6 +10,7 @@ from ultralytics import YOLO
 from deep_sort_realtime.deepsort_tracker import DeepSort
 from fast_plate_ocr import LicensePlateRecognizer
 from PIL import Image, ImageTk
+from yolo_utils import bbox_to_ints
 
 # ---------------------------
 # Config
@@ -40,19 +40,6 @@ result_queue = queue.Queue()
 # ---------------------------
 # Utils
 # ---------------------------
-def bbox_to_ints(xy):
-    try:
-        coords = xy[0] if hasattr(xy[0], "__getitem__") else xy
-        a = coords.cpu().numpy() if hasattr(coords, "cpu") else np.array(coords)
-        x1, y1, x2, y2 = map(int, a.tolist())
-        return x1, y1, x2, y2
-    except Exception:
-        a = np.array(xy)
-        if a.size >= 4:
-            x1, y1, x2, y2 = map(int, a.flatten()[:4])
-            return x1, y1, x2, y2
-        raise
-
 def centroid(box):
     x1, y1, x2, y2 = box
     return ((x1+x2)/2, (y1+y2)/2)
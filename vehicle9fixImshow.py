@@ -1,16 +1,31 @@
 import os
+import sys
 import cv2
+import time
+import numpy as np
 import queue
 import threading
-import sqlite3
-import numpy as np
+import subprocess
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 from datetime import datetime
-from ultralytics import YOLO
 from deep_sort_realtime.deepsort_tracker import DeepSort
 from fast_plate_ocr import LicensePlateRecognizer
-from PIL import Image, ImageTk
+from plate_ocr import PlateOCR
+from plate_memory import PlateMemory
+from stride import DetectionStride, predict_tracks
+from capture import FrameGrabber
+from image_writer import ImageWriter
+from best_shot import BestShots
+from association import associate
+from db_writer import DBWriter
+from zones import load_camera, load_zones
+from resolution import ResolutionControl
+from detector_backend import load_detector
+from yolo_utils import deepsort_detections, ltwh_detections, result_arrays
+from metrics import METRICS, draw_overlay, metrics_panel, SnapshotWriter, serve_http
+from display import LatestFrame, FrameView, refresh_loop
+from thumbnails import ThumbnailCache
 
 # ---------------------------
 # Config
@@ -18,45 +33,59 @@ from PIL import Image, ImageTk
 VEHICLE_MODEL_PATH = "yolov8n-vehicle.pt"
 PLATE_MODEL_PATH = "license_plate_detector.pt"
 OCR_MODEL_NAME = "cct-xs-v1-global-model"
+DETECTOR_BACKEND = "torch"   # "torch" | "onnx" | "onnx-int8" (see detector_backend.py)
 
 SAVED_CARS = "saved_cars"
 SAVED_PLATES = "saved_plates"
 SAVED_FACES = "saved_faces"
 DB_PATH = "plates.db"
 
+DETECT_STRIDE = 1         # run YOLO every k frames
+ADAPTIVE_STRIDE = False   # let k follow frame latency and scene motion
+VEHICLE_IMGSZ = 640       # detector input sizes (zones.json "imgsz" overrides per camera)
+PLATE_IMGSZ = 640
+DYNAMIC_RESOLUTION = False  # smaller vehicle input under load, larger plate input when plates are missed
+
+DISPLAY_SIZE = (800, 450)  # video preview size
+DISPLAY_FPS = 15          # preview refresh rate; recognition runs at its own pace
+TABLE_REFRESH_MS = 200    # queued results are folded into one table update this often
+LEFT_ROW_MS = 3000        # a car that left stays (red) this long before its row is removed
+
+METRICS_OVERLAY = False   # draw FPS / stage latencies on the video (toggle in the GUI)
+METRICS_FILE = None       # e.g. "metrics.json" or "metrics.prom": snapshot rewritten every few seconds
+METRICS_PORT = None       # e.g. 9108: serve /metrics and /metrics.json on localhost
+
 os.makedirs(SAVED_CARS, exist_ok=True)
 os.makedirs(SAVED_PLATES, exist_ok=True)
 os.makedirs(SAVED_FACES, exist_ok=True)
 
 # Load models
-vehicle_model = YOLO(VEHICLE_MODEL_PATH)
-plate_model = YOLO(PLATE_MODEL_PATH)
+vehicle_model = load_detector(VEHICLE_MODEL_PATH, DETECTOR_BACKEND)
+plate_model = load_detector(PLATE_MODEL_PATH, DETECTOR_BACKEND)
 ocr = LicensePlateRecognizer(OCR_MODEL_NAME)
+plate_ocr = PlateOCR(ocr)
+plate_memory = PlateMemory()
+stride = DetectionStride(DETECT_STRIDE, adaptive=ADAPTIVE_STRIDE)
 tracker = DeepSort(max_age=30, n_init=3, nn_budget=100)
+image_writer = ImageWriter(preview=True)
+best_shots = BestShots(image_writer, SAVED_CARS, SAVED_PLATES)
+
+# All plate_logs writes go through one group-commit thread (WAL, batched commits)
+db_writer = DBWriter(DB_PATH, schema=["""
+    CREATE TABLE IF NOT EXISTS plate_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        car_id INTEGER,
+        plate TEXT UNIQUE,
+        car_path TEXT,
+        plate_path TEXT,
+        face_path TEXT,
+        timestamp TEXT
+    )
+"""])
 
 # Thread-safe queue
 result_queue = queue.Queue()
 
-# ---------------------------
-# Utils
-# ---------------------------
-def bbox_to_ints(xy):
-    try:
-        coords = xy[0] if hasattr(xy[0], "__getitem__") else xy
-        a = coords.cpu().numpy() if hasattr(coords, "cpu") else np.array(coords)
-        x1, y1, x2, y2 = map(int, a.tolist())
-        return x1, y1, x2, y2
-    except Exception:
-        a = np.array(xy)
-        if a.size >= 4:
-            x1, y1, x2, y2 = map(int, a.flatten()[:4])
-            return x1, y1, x2, y2
-        raise
-
-def centroid(box):
-    x1, y1, x2, y2 = box
-    return ((x1+x2)/2, (y1+y2)/2)
-
 # ---------------------------
 # GUI
 # ---------------------------
@@ -77,6 +106,15 @@ class App:
         self.btn_open.pack(side=tk.LEFT, padx=6)
         self.btn_stop = tk.Button(btn_frame, text="Dừng", command=self.stop_video, state=tk.DISABLED)
         self.btn_stop.pack(side=tk.LEFT, padx=6)
+        self.btn_zones = tk.Button(btn_frame, text="Vùng nhận diện", command=self.edit_zones)
+        self.btn_zones.pack(side=tk.LEFT, padx=6)
+        self.show_metrics = tk.BooleanVar(value=METRICS_OVERLAY)
+        self.overlay = METRICS_OVERLAY  # plain copy: the video thread must not touch Tk variables
+        tk.Checkbutton(btn_frame, text="Số liệu", variable=self.show_metrics,
+                       command=lambda: setattr(self, "overlay", self.show_metrics.get())).pack(side=tk.LEFT, padx=6)
+
+        # Live stage timings / queue depths
+        metrics_panel(left_frame).pack(side=tk.BOTTOM, fill=tk.X, padx=6, pady=4)
 
         # Treeview
         columns = ("car_id", "plate", "time")
@@ -114,11 +152,22 @@ class App:
         self.running = False
         self.cap = None
         self.current_video_path = None
-        self.latest_entries = []
-        self.car_states = {}
+        self.zones = None
+        self.zone_editor = None   # Popen of zone_editor.py while it is open
+        self.res = None
+        self.entries = {}      # row iid (= str(car_id)) -> latest entry of that car
+        self.rows = {}         # iid -> values currently shown
+        self.car_states = {}   # iid -> 'new' | 'present' | 'left'
+        self.left_since = {}   # iid -> monotonic time the car left
+        self.thumbs = ThumbnailCache()
+
+        # The video thread only publishes its latest frame; Tk draws it at DISPLAY_FPS
+        self.display_slot = LatestFrame()
+        self.display = FrameView(self.preview_car, DISPLAY_SIZE)  # Dùng label car làm video
+        refresh_loop(self.root, self.display_slot, self.display, DISPLAY_FPS, on_tick=self.check_video_thread)
 
         # Poll queue
-        self.root.after(200, self.process_queue)
+        self.root.after(TABLE_REFRESH_MS, self.process_queue)
 
     # ---------------- Video controls ----------------
     def select_and_start(self):
@@ -131,6 +180,9 @@ class App:
         if self.running:
             messagebox.showinfo("Thông báo", "Video đang chạy")
             return
+        if self.zone_editor is not None and self.zone_editor.poll() is None:
+            messagebox.showinfo("Thông báo", "Đóng cửa sổ sửa vùng trước")
+            return
         if self.current_video_path:
             cap = cv2.VideoCapture(self.current_video_path)
             if not cap.isOpened():
@@ -142,174 +194,189 @@ class App:
                 messagebox.showerror("Lỗi", "Không mở được camera")
                 return
 
-        self.cap = cap
+        # ROI polygons of this camera/video (zones.json); None = full frame
+        self.zones = load_zones(self.current_video_path or 0)
+        imgsz = load_camera(self.current_video_path or 0).get("imgsz", {})
+        self.res = ResolutionControl(imgsz.get("vehicle", VEHICLE_IMGSZ), imgsz.get("plate", PLATE_IMGSZ),
+                                     dynamic=DYNAMIC_RESOLUTION, target_fps=cap.get(cv2.CAP_PROP_FPS) or 25.0)
+
+        # Decode on its own thread; a camera only ever hands over its newest frame
+        self.cap = FrameGrabber(cap, lossless=bool(self.current_video_path))
         self.running = True
         self.btn_open.config(state=tk.DISABLED)
         self.btn_stop.config(state=tk.NORMAL)
         self.video_thread = threading.Thread(target=self.video_loop, daemon=True)
         self.video_thread.start()
 
+    def edit_zones(self):
+        if self.running:
+            messagebox.showinfo("Thông báo", "Dừng video trước khi sửa vùng")
+            return
+        if self.zone_editor is not None and self.zone_editor.poll() is None:
+            messagebox.showinfo("Thông báo", "Cửa sổ sửa vùng đang mở")
+            return
+        path = filedialog.askopenfilename(title="Chọn video (hoặc hủy để dùng camera)",
+                                          filetypes=[("Video files", "*.mp4 *.avi *.mov *.mkv"), ("All files", "*.*")])
+        # The editor is a highgui loop: run it in its own process so the Tk mainloop keeps going.
+        # It writes zones.json, which start_video reads
+        editor = os.path.join(os.path.dirname(os.path.abspath(__file__)), "zone_editor.py")
+        self.zone_editor = subprocess.Popen([sys.executable, editor, path or "0"])
+
     def stop_video(self):
         self.running = False
         self.btn_open.config(state=tk.NORMAL)
         self.btn_stop.config(state=tk.DISABLED)
 
+    def check_video_thread(self):
+        # The video thread never touches Tk: its end is noticed here, on the main loop
+        if self.video_thread is not None and not self.video_thread.is_alive():
+            self.video_thread = None
+            self.stop_video()
+
     # ---------------- Treeview update ----------------
     def process_queue(self):
-        if not result_queue.empty():
-            self.latest_entries = result_queue.get()
-            self.update_treeview(self.latest_entries)
-        self.root.after(200, self.process_queue)
-
-    def update_treeview(self, entries):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        current_ids = set([e['car_id'] for e in entries])
-        previous_ids = set(self.car_states.keys())
-        new_ids = current_ids - previous_ids
-        for e in entries:
-            tag = 'new_car' if e['car_id'] in new_ids else ''
-            self.tree.insert('', tk.END, values=(e['car_id'], e['plate_text'] or '', e['ts']), tags=(tag,))
-            self.car_states[e['car_id']] = 'present'
-        left_ids = previous_ids - current_ids
-        for car_id in left_ids:
-            self.car_states[car_id] = 'left'
-        self.root.after(3000, self.remove_left_cars)
+        # Coalesce: every frame queued since the last tick becomes one table update
+        batches = []
+        while True:
+            try:
+                batches.append(result_queue.get_nowait())
+            except queue.Empty:
+                break
+        if batches:
+            self.update_treeview(batches)
+        self.remove_left_cars()
+        self.root.after(TABLE_REFRESH_MS, self.process_queue)
+
+    def update_treeview(self, batches):
+        # Rows are keyed by car_id: only new, changed or departed cars touch the tree,
+        # so selection and scroll position survive the refresh
+        current = {}
+        for entries in batches:
+            for e in entries:
+                current[str(e['car_id'])] = e
+
+        for iid, state in list(self.car_states.items()):
+            if iid in current:
+                if state != 'present':  # new last time, or back before its row was removed
+                    self.tree.item(iid, tags=())
+                    self.car_states[iid] = 'present'
+                    self.left_since.pop(iid, None)
+            elif state != 'left':
+                self.tree.item(iid, tags=('left_car',))
+                self.car_states[iid] = 'left'
+                self.left_since[iid] = time.monotonic()
+
+        for iid, e in current.items():
+            old = self.entries.get(iid)
+            if old and not e['plate_text']:
+                e = dict(e, plate_text=old['plate_text'])  # keep the last plate read for this car
+            self.entries[iid] = e
+            values = (e['car_id'], e['plate_text'] or '', e['ts'])
+            if iid not in self.rows:
+                self.tree.insert('', tk.END, iid=iid, values=values, tags=('new_car',))
+                self.car_states[iid] = 'new'
+            elif values != self.rows[iid]:
+                self.tree.item(iid, values=values)
+            self.rows[iid] = values
 
     def remove_left_cars(self):
-        for item_id in self.tree.get_children():
-            vals = self.tree.item(item_id, 'values')
-            car_id = int(vals[0])
-            if self.car_states.get(car_id) == 'left':
-                self.tree.delete(item_id)
-                del self.car_states[car_id]
+        now = time.monotonic()
+        for iid, since in list(self.left_since.items()):
+            if now - since >= LEFT_ROW_MS / 1000:
+                self.tree.delete(iid)
+                for d in (self.left_since, self.car_states, self.rows, self.entries):
+                    d.pop(iid, None)
 
     # ---------------- Row selection preview ----------------
     def on_row_selected(self, event=None):
         sel = self.tree.selection()
         if not sel: return
-        idx = self.tree.index(sel[0])
-        if idx < 0 or idx >= len(self.latest_entries): return
-        item = self.latest_entries[idx]
-
-        # Car preview
-        if item.get("car_path") and os.path.exists(item["car_path"]):
-            im = Image.open(item["car_path"])
-            im.thumbnail((400, 200))
-            tkim = ImageTk.PhotoImage(im)
-            self.preview_car.config(image=tkim, text="")
-            self.preview_car.image = tkim
-        else:
-            self.preview_car.config(image="", text="Không có ảnh xe")
-            self.preview_car.image = None
-
-        # Plate preview
-        if item.get("plate_path") and os.path.exists(item["plate_path"]):
-            im = Image.open(item["plate_path"])
-            im.thumbnail((400, 150))
-            tkim = ImageTk.PhotoImage(im)
-            self.preview_plate.config(image=tkim, text="")
-            self.preview_plate.image = tkim
-        else:
-            self.preview_plate.config(image="", text="Không có ảnh biển số")
-            self.preview_plate.image = None
-
-        # Face preview (if exists)
-        if item.get("face_path") and os.path.exists(item["face_path"]):
-            im = Image.open(item["face_path"])
-            im.thumbnail((400, 150))
-            tkim = ImageTk.PhotoImage(im)
-            self.preview_face.config(image=tkim, text="")
-            self.preview_face.image = tkim
-        else:
-            self.preview_face.config(image="", text="Không có ảnh mặt")
-            self.preview_face.image = None
+        item = self.entries.get(sel[0])
+        if item is None: return
+
+        # Thumbnails come from the cache (preview variant or draft-mode decode)
+        self.thumbs.show(self.preview_car, item.get("car_path"), (400, 200), "Không có ảnh xe")
+        self.thumbs.show(self.preview_plate, item.get("plate_path"), (400, 150), "Không có ảnh biển số")
+        self.thumbs.show(self.preview_face, item.get("face_path"), (400, 150), "Không có ảnh mặt")
+
+        # Decode the neighbouring rows ahead, so arrow-key browsing never waits on a JPEG
+        for iid in (self.tree.next(sel[0]), self.tree.prev(sel[0])):
+            e = self.entries.get(iid)
+            if e:
+                self.thumbs.prefetch([(e.get("car_path"), (400, 200)), (e.get("plate_path"), (400, 150)),
+                                      (e.get("face_path"), (400, 150))])
 
     # ---------------- Video processing ----------------
     # ---------------- Video processing ----------------
     def video_loop(self):
-        db = sqlite3.connect(DB_PATH)
-        cur = db.cursor()
-        cur.execute("""
-                    CREATE TABLE IF NOT EXISTS plate_logs
-                    (
-                        id
-                        INTEGER
-                        PRIMARY
-                        KEY
-                        AUTOINCREMENT,
-                        car_id
-                        INTEGER,
-                        plate
-                        TEXT
-                        UNIQUE,
-                        car_path
-                        TEXT,
-                        plate_path
-                        TEXT,
-                        face_path
-                        TEXT,
-                        timestamp
-                        TEXT
-                    )
-                    """)
-        db.commit()
 
         cap = self.cap
+        zones = self.zones
+        res = self.res
+        matched_car_ids = set()
 
         try:
             while self.running:
                 ret, frame = cap.read()
                 if not ret: break
 
-                # ---- Vehicle detection ----
-                veh_results = vehicle_model(frame)[0]
-                detections = []
-                for box in veh_results.boxes:
-                    try:
-                        x1, y1, x2, y2 = bbox_to_ints(box.xyxy)
-                    except:
-                        x1, y1, x2, y2 = bbox_to_ints(box.xyxy[0])
-                    conf = float(box.conf[0]) if hasattr(box.conf, "__getitem__") else float(box.conf)
-                    if conf < 0.25: continue
-                    detections.append(([x1, y1, x2 - x1, y2 - y1], conf, None))
-
-                # ---- Tracking ----
-                tracks = tracker.update_tracks(detections, frame=frame)
+                detect = stride.should_detect()
+                t0 = time.perf_counter()
+                if detect:
+                    # ---- Vehicle detection ----
+                    if zones:  # detector sees only the zones' crop, boxes outside are dropped
+                        detections = ltwh_detections(*zones.detect(vehicle_model, frame, conf=0.25,
+                                                                   imgsz=res.vehicle_imgsz))
+                    else:
+                        detections = deepsort_detections(vehicle_model(frame, imgsz=res.vehicle_imgsz)[0], conf=0.25)
+                    t_track = time.perf_counter()
+                    METRICS.observe("vehicle", t_track - t0)
+
+                    # ---- Tracking ----
+                    tracks = tracker.update_tracks(detections, frame=frame)
+                    METRICS.observe("track", time.perf_counter() - t_track)
+                else:
+                    # Skipped frame: Kalman prediction fills the gap
+                    tracks = predict_tracks(tracker)
                 tracked_cars = [(t.track_id, *map(int, t.to_ltrb())) for t in tracks if t.is_confirmed()]
+                active_ids = {t.track_id for t in tracks}
+                plate_memory.evict(active_ids)
+                best_shots.expire(active_ids)
 
                 # ---- Plate detection ----
-                plate_results = plate_model(frame)[0]
                 plate_bboxes = []
-                for box in plate_results.boxes:
-                    try:
-                        px1, py1, px2, py2 = bbox_to_ints(box.xyxy)
-                    except:
-                        px1, py1, px2, py2 = bbox_to_ints(box.xyxy[0])
-                    conf = float(box.conf[0]) if hasattr(box.conf, "__getitem__") else float(box.conf)
-                    if conf < 0.25: continue
-                    plate_bboxes.append((px1, py1, px2, py2))
+                if detect:
+                    stride.observe(tracked_cars)
+                    with METRICS.timer("plate"):
+                        if zones:
+                            xyxy, _, _ = zones.detect(plate_model, frame, conf=0.25, imgsz=res.plate_imgsz)
+                        else:
+                            xyxy, _, _ = result_arrays(plate_model(frame, imgsz=res.plate_imgsz)[0], conf=0.25)
+                    plate_bboxes = [tuple(b) for b in xyxy.tolist()]
 
                 # ---- Match plates to cars ----
-                matches = []
-                for pb in plate_bboxes:
-                    pcx, pcy = centroid(pb)
-                    for car_id, x1, y1, x2, y2 in tracked_cars:
-                        if x1 <= pcx <= x2 and y1 <= pcy <= y2:
-                            matches.append((car_id, pb))
-                            break
+                # One plate per car, one car per plate (global assignment on plate-in-car overlap)
+                matches = associate(plate_bboxes, tracked_cars)
 
-                matched_car_ids = set([c for c, _ in matches])
+                if detect:  # skipped frames keep the last known plate/no-plate state
+                    matched_car_ids = set([c for c, _ in matches])
+                    res.observe(tracked_cars, matched_car_ids, frame.shape[0])
 
                 # ---- Highlight cars without plates ----
-                overlay = frame.copy()
+                # Blend only the boxes, in place (no full-frame overlay copy)
                 alpha = 0.3
+                fh, fw = frame.shape[:2]
                 for car_id, x1, y1, x2, y2 in tracked_cars:
                     if car_id not in matched_car_ids:
-                        cv2.rectangle(overlay, (x1, y1), (x2, y2), (0, 0, 255), -1)
-                cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
+                        roi = frame[max(0, y1):min(fh, y2), max(0, x1):min(fw, x2)]
+                        if roi.size == 0: continue
+                        red = np.empty_like(roi)
+                        red[:] = (0, 0, 255)
+                        cv2.addWeighted(red, alpha, roi, 1 - alpha, 0, roi)
 
                 # ---- Draw boxes and IDs ----
+                if zones:
+                    zones.draw(frame)
                 for car_id, x1, y1, x2, y2 in tracked_cars:
                     cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
                     cv2.putText(frame, f"ID:{car_id}", (x1, max(12, y1 - 6)), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
@@ -324,39 +391,33 @@ class App:
                     vb = next((v for v in tracked_cars if v[0] == car_id), None)
                     if vb is None: continue
                     _, vx1, vy1, vx2, vy2 = vb
-                    car_crop = frame[vy1:vy2, vx1:vx2].copy()
-                    plate_crop = frame[py1:py2, px1:px2].copy() if px2 > px1 and py2 > py1 else None
+                    # Views only: best_shots copies a crop when it becomes the track's best
+                    car_crop = frame[vy1:vy2, vx1:vx2]
+                    plate_crop = frame[py1:py2, px1:px2] if px2 > px1 and py2 > py1 else None
 
                     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    car_path = os.path.join(SAVED_CARS, f"car_{car_id}_{ts}.jpg")
-                    cv2.imwrite(car_path, car_crop)
-
-                    plate_path = None
                     plate_text = None
+                    char_probs = None
                     if plate_crop is not None and plate_crop.size > 0:
-                        plate_path = os.path.join(SAVED_PLATES, f"plate_{car_id}_{ts}.jpg")
-                        cv2.imwrite(plate_path, plate_crop)
-                        try:
-                            plate_text_raw = ocr.run(cv2.cvtColor(plate_crop, cv2.COLOR_BGR2RGB))
-                            plate_text = "".join(plate_text_raw) if isinstance(plate_text_raw, list) else plate_text_raw
-                        except:
-                            plate_text = None
+                        # Skip OCR once this track's plate is settled
+                        text, char_probs = plate_ocr.read_one(plate_crop) if plate_memory.needs_ocr(car_id) else (None, None)
+                        plate_text, _ = plate_memory.add(car_id, text, char_probs)
+
+                    # One car/plate image per track, written when the track ends or times out
+                    best_shots.offer(car_id, car_crop, plate_crop, char_probs)
+                    car_path, plate_path = best_shots.paths(car_id)
+                    if plate_crop is None or plate_crop.size == 0:
+                        plate_path = None
 
                     # Face detection placeholder
                     face_path = None
 
-                    # Save DB
-                    try:
-                        if plate_text:
-                            cur.execute("SELECT plate FROM plate_logs WHERE plate=?", (plate_text,))
-                            if not cur.fetchone():
-                                cur.execute("""INSERT INTO plate_logs
-                                                   (car_id, plate, car_path, plate_path, face_path, timestamp)
-                                               VALUES (?, ?, ?, ?, ?, ?)""",
-                                            (car_id, plate_text, car_path, plate_path, face_path, ts))
-                                db.commit()
-                    except:
-                        pass
+                    # Save DB (queued; plate is UNIQUE so repeats are ignored)
+                    if plate_text:
+                        db_writer.execute("""INSERT OR IGNORE INTO plate_logs
+                                                 (car_id, plate, car_path, plate_path, face_path, timestamp)
+                                             VALUES (?, ?, ?, ?, ?, ?)""",
+                                          (car_id, plate_text, car_path, plate_path, face_path, ts))
 
                     if plate_text:
                         cv2.putText(frame, str(plate_text), (px1, max(12, py1 - 20)), cv2.FONT_HERSHEY_SIMPLEX, 0.8,
@@ -372,35 +433,33 @@ class App:
                     })
 
                 result_queue.put(frame_entries)
+                latency = time.perf_counter() - t0
+                stride.update(latency)
+                res.update(latency)
+                METRICS.observe("frame", latency)
+                METRICS.tick("frames")
+                METRICS.set("result_queue", result_queue.qsize())
+                if self.overlay:
+                    draw_overlay(frame)
 
                 # ---------------- Tkinter display ----------------
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                img = Image.fromarray(rgb_frame)
-                img = img.resize((800, 450))  # Resize nếu muốn
-                imgtk = ImageTk.PhotoImage(image=img)
-                self.preview_car.config(image=imgtk)  # Dùng label car làm video
-                self.preview_car.image = imgtk
-
-                # Delay tương đương cv2.waitKey
-                self.root.update_idletasks()
-                self.root.update()
+                # Hand the frame to the Tk thread (refresh_loop) and go on with the next one
+                self.display_slot.publish(frame)
 
         finally:
-            try:
-                db.close()
-            except:
-                pass
+            best_shots.finish_all()
             try:
                 cap.release()
             except:
                 pass
             self.running = False
-            self.btn_open.config(state=tk.NORMAL)
-            self.btn_stop.config(state=tk.DISABLED)
 
 
 # ---------------------------
 if __name__=="__main__":
+    if METRICS_PORT: serve_http(METRICS_PORT)
+    snapshots = SnapshotWriter(METRICS_FILE) if METRICS_FILE else None
     root=tk.Tk()
     app=App(root)
     root.mainloop()
+    if snapshots: snapshots.close()
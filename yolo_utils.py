@@ -0,0 +1,53 @@
+import numpy as np
+
+# ---------------------------
+# YOLO results -> NumPy
+# ---------------------------
+def bbox_to_ints(xy):
+    try:
+        coords = xy[0] if hasattr(xy[0], "__getitem__") else xy
+        a = coords.cpu().numpy() if hasattr(coords, "cpu") else np.array(coords)
+        x1, y1, x2, y2 = map(int, a.tolist())
+        return x1, y1, x2, y2
+    except Exception:
+        a = np.array(xy)
+        if a.size >= 4:
+            x1, y1, x2, y2 = map(int, a.flatten()[:4])
+            return x1, y1, x2, y2
+        raise
+
+def result_arrays(result, conf=None, classes=None):
+    """Pull a whole ultralytics result out in one device->host transfer.
+
+    Returns (xyxy int32 (N, 4), conf float32 (N,), cls int32 (N,)), already
+    filtered by `conf` (minimum confidence) and `classes` (allowed class ids).
+    """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 4), np.int32), np.zeros(0, np.float32), np.zeros(0, np.int32)
+    data = boxes.data
+    data = data.cpu().numpy() if hasattr(data, "cpu") else np.asarray(data)  # (N, 6): x1 y1 x2 y2 conf cls
+    keep = np.ones(len(data), bool)
+    if conf is not None:
+        keep &= data[:, 4] >= conf
+    if classes is not None:
+        keep &= np.isin(data[:, 5].astype(np.int32), list(classes))
+    data = data[keep]
+    return data[:, :4].astype(np.int32), data[:, 4].astype(np.float32), data[:, 5].astype(np.int32)
+
+def box_tuples(xyxy, confs):
+    return [(x1, y1, x2, y2, c) for (x1, y1, x2, y2), c in zip(xyxy.tolist(), confs.tolist())]
+
+def ltwh_detections(xyxy, confs, cls):
+    ltwh = xyxy.copy()
+    ltwh[:, 2:] -= xyxy[:, :2]
+    return [(box, c, k) for box, c, k in zip(ltwh.tolist(), confs.tolist(), cls.tolist())]
+
+def result_boxes(result, conf=None, classes=None):
+    """[(x1, y1, x2, y2, conf)] as plain Python values, one tolist() per result."""
+    xyxy, confs, _ = result_arrays(result, conf, classes)
+    return box_tuples(xyxy, confs)
+
+def deepsort_detections(result, conf=None, classes=None):
+    """Detections in DeepSort's ([left, top, w, h], conf, class) format."""
+    return ltwh_detections(*result_arrays(result, conf, classes))
@@ -0,0 +1,177 @@
+import sys
+import cv2
+import numpy as np
+import tkinter as tk
+from tkinter import filedialog, messagebox
+from zones import ZONES_FILE, camera_key, load_all, save_zones
+
+# =======================
+# Zone editor: vẽ vùng nhận diện (ROI) cho từng camera/video
+#   click trái        : thêm điểm cho vùng đang vẽ / kéo điểm / kéo cả vùng
+#   click phải, Enter : đóng vùng đang vẽ (>= 3 điểm)
+#   r                 : thêm vùng chữ nhật (kéo từng góc để chỉnh)
+#   d                 : xóa vùng đang chọn     u : xóa điểm cuối
+#   s                 : lưu vào zones.json     q / Esc : thoát
+# =======================
+WINDOW = "Zone Editor"
+corner_size = 10
+min_points = 3
+
+polygons = []       # các vùng đã đóng, mỗi vùng là list [x, y]
+current = []        # vùng đang vẽ
+selected = None     # index vùng đang chọn
+drag_point = None   # (index vùng, index điểm)
+drag_poly = None    # (index vùng, x, y) lúc bắt đầu kéo
+scale_ratio = 1.0
+video_width = 0
+video_height = 0
+
+def clamp(x, y):
+    return max(0, min(video_width - 1, x)), max(0, min(video_height - 1, y))
+
+def inside(poly, x, y):
+    return cv2.pointPolygonTest(np.array(poly, np.int32), (float(x), float(y)), False) >= 0
+
+# =======================
+# Mouse callback
+# =======================
+def mouse_callback(event, x, y, flags, param):
+    global selected, drag_point, drag_poly
+    x, y = clamp(int(x / scale_ratio), int(y / scale_ratio))
+
+    if event == cv2.EVENT_LBUTTONDOWN:
+        # Điểm (góc) trước
+        for pi, poly in enumerate(polygons):
+            for vi, (vx, vy) in enumerate(poly):
+                if abs(x - vx) <= corner_size and abs(y - vy) <= corner_size:
+                    selected, drag_point = pi, (pi, vi)
+                    return
+        # Kéo cả vùng
+        if not current:
+            for pi in reversed(range(len(polygons))):
+                if inside(polygons[pi], x, y):
+                    selected, drag_poly = pi, (pi, x, y)
+                    return
+        # Thêm điểm cho vùng đang vẽ
+        selected = None
+        current.append([x, y])
+
+    elif event == cv2.EVENT_LBUTTONUP:
+        drag_point = None
+        drag_poly = None
+
+    elif event == cv2.EVENT_RBUTTONDOWN:
+        close_current()
+
+    elif event == cv2.EVENT_MOUSEMOVE:
+        if drag_point:
+            pi, vi = drag_point
+            polygons[pi][vi] = [x, y]
+        elif drag_poly:
+            pi, sx, sy = drag_poly
+            xs = [p[0] for p in polygons[pi]]
+            ys = [p[1] for p in polygons[pi]]
+            dx = max(-min(xs), min(video_width - 1 - max(xs), x - sx))
+            dy = max(-min(ys), min(video_height - 1 - max(ys), y - sy))
+            polygons[pi] = [[px + dx, py + dy] for px, py in polygons[pi]]
+            drag_poly = (pi, sx + dx, sy + dy)
+
+def close_current():
+    global current, selected
+    if len(current) >= min_points:
+        polygons.append(current)
+        selected = len(polygons) - 1
+    current = []
+
+def add_rect():
+    global selected
+    rw, rh = video_width // 4, video_height // 4
+    rx, ry = (video_width - rw) // 2, (video_height - rh) // 2
+    polygons.append([[rx, ry], [rx + rw, ry], [rx + rw, ry + rh], [rx, ry + rh]])
+    selected = len(polygons) - 1
+
+# =======================
+# Vẽ
+# =======================
+def render(frame):
+    disp = frame.copy()
+    overlay = disp.copy()
+    for pi, poly in enumerate(polygons):
+        pts = np.array(poly, np.int32)
+        color = (0, 255, 255) if pi == selected else (0, 255, 0)
+        cv2.fillPoly(overlay, [pts], color)
+        cv2.polylines(disp, [pts], True, color, 2)
+        for vx, vy in poly:
+            cv2.rectangle(disp, (vx - 5, vy - 5), (vx + 5, vy + 5), (0, 0, 255), -1)
+    cv2.addWeighted(overlay, 0.2, disp, 0.8, 0, disp)
+    if current:
+        pts = np.array(current, np.int32)
+        cv2.polylines(disp, [pts], False, (255, 0, 0), 2)
+        for vx, vy in current:
+            cv2.circle(disp, (vx, vy), 4, (255, 0, 0), -1)
+    disp_w = int(disp.shape[1] * scale_ratio)
+    disp_h = int(disp.shape[0] * scale_ratio)
+    return cv2.resize(disp, (disp_w, disp_h))
+
+# =======================
+# Main
+# =======================
+def first_frame(source):
+    cap = cv2.VideoCapture(int(source)) if str(source).isdigit() else cv2.VideoCapture(source)
+    ret, frame = cap.read()
+    cap.release()
+    return frame if ret else None
+
+def edit(source, path=ZONES_FILE, max_w=1280, max_h=720):
+    global polygons, current, selected, scale_ratio, video_width, video_height
+    frame = first_frame(source)
+    if frame is None:
+        print(f"[!] Không đọc được: {source}", file=sys.stderr)
+        return False
+    video_height, video_width = frame.shape[:2]
+    scale_ratio = min(max_w / video_width, max_h / video_height, 1.0)
+
+    entry = load_all(path).get(camera_key(source), {})
+    polygons = [[list(p) for p in poly] for poly in entry.get("polygons", [])]
+    size = entry.get("size")
+    if size and tuple(size) != (video_width, video_height):
+        sx, sy = video_width / size[0], video_height / size[1]
+        polygons = [[[int(px * sx), int(py * sy)] for px, py in poly] for poly in polygons]
+    current, selected = [], None
+
+    cv2.namedWindow(WINDOW)
+    cv2.setMouseCallback(WINDOW, mouse_callback)
+    saved = False
+    while True:
+        cv2.imshow(WINDOW, render(frame))
+        key = cv2.waitKey(30) & 0xFF
+        if key in (ord('q'), 27):
+            break
+        elif key in (13, 10):
+            close_current()
+        elif key == ord('r'):
+            add_rect()
+        elif key == ord('u') and current:
+            current.pop()
+        elif key == ord('d') and selected is not None:
+            polygons.pop(selected)
+            selected = None
+        elif key == ord('s'):
+            close_current()
+            save_zones(source, polygons, (video_width, video_height), path)
+            print(f"Đã lưu {len(polygons)} vùng cho {camera_key(source)} -> {path}")
+            saved = True
+    cv2.destroyWindow(WINDOW)
+    return saved
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        edit(sys.argv[1])
+    else:
+        root = tk.Tk()
+        root.withdraw()
+        path = filedialog.askopenfilename(title="Chọn video (hoặc hủy để dùng camera)",
+                                          filetypes=[("Video files", "*.mp4 *.avi *.mov *.mkv"),
+                                                     ("All files", "*.*")])
+        if not edit(path or "0"):
+            messagebox.showinfo("Zone Editor", "Chưa lưu vùng nào")
@@ -0,0 +1,111 @@
+import os
+import json
+import cv2
+import numpy as np
+from yolo_utils import result_arrays
+
+# ---------------------------
+# Detection zones (ROI polygons per camera)
+# zones.json: {camera_key: {"size": [w, h], "polygons": [...],
+#                           "imgsz": {"vehicle": 416, "plate": 960}}}
+# ---------------------------
+ZONES_FILE = "zones.json"
+ZONE_PAD = 32             # px of context kept around the zones' bounding box
+
+def camera_key(source):
+    """Key of a source in zones.json: camera index -> "cam0", file -> basename, URL as is."""
+    source = str(source)
+    if source.isdigit():
+        return f"cam{source}"
+    if "://" in source:
+        return source
+    return os.path.basename(source)
+
+def load_all(path=ZONES_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def load_camera(source, path=ZONES_FILE):
+    """The whole per-camera entry (zones, imgsz, ...) or {}."""
+    return load_all(path).get(camera_key(source), {})
+
+def load_zones(source, path=ZONES_FILE):
+    """Zones for one source, or None when the camera has none (= full frame)."""
+    entry = load_camera(source, path)
+    if not entry or not entry.get("polygons"):
+        return None
+    zones = Zones(entry["polygons"], size=entry.get("size"))
+    # A hand-edited entry may hold only degenerate polygons (< 3 points)
+    return zones if zones.polygons else None
+
+def save_zones(source, polygons, size, path=ZONES_FILE):
+    data = load_all(path)
+    # Keep the camera's other settings (imgsz, ...)
+    data.setdefault(camera_key(source), {}).update(
+        {"size": list(size), "polygons": [[list(map(int, p)) for p in poly] for poly in polygons]})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+class Zones:
+    """Polygons in source pixel coordinates.
+
+    crop(frame) returns the bounding crop of all zones (a view) and its offset;
+    arrays(result, offset) maps a result on that crop back to the frame and drops
+    boxes whose centre falls outside every polygon. `size` is the (w, h) the
+    polygons were drawn on; other resolutions are scaled to it.
+    """
+    def __init__(self, polygons, size=None, pad=ZONE_PAD):
+        self.polygons = [np.asarray(p, np.float32).reshape(-1, 2) for p in polygons if len(p) >= 3]
+        self.size = tuple(size) if size else None
+        self.pad = pad
+        self.shape = None
+        self.mask = None
+        self.bounds = None
+
+    def _prepare(self, shape):
+        if shape[:2] == self.shape:
+            return
+        h, w = shape[:2]
+        sx, sy = (w / self.size[0], h / self.size[1]) if self.size else (1.0, 1.0)
+        polys = [np.round(p * (sx, sy)).astype(np.int32) for p in self.polygons]
+        self.mask = np.zeros((h, w), np.uint8)
+        cv2.fillPoly(self.mask, polys, 1)
+        pts = np.concatenate(polys)
+        x1, y1 = pts.min(axis=0) - self.pad
+        x2, y2 = pts.max(axis=0) + self.pad
+        self.bounds = (max(0, int(x1)), max(0, int(y1)), min(w, int(x2)), min(h, int(y2)))
+        self.scaled = polys
+        self.shape = shape[:2]
+
+    def crop(self, frame):
+        self._prepare(frame.shape)
+        x1, y1, x2, y2 = self.bounds
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    def contains(self, xyxy):
+        """Bool per box: is its centre inside a zone? xyxy in frame coordinates."""
+        if len(xyxy) == 0:
+            return np.zeros(0, bool)
+        h, w = self.mask.shape
+        cx = np.clip((xyxy[:, 0] + xyxy[:, 2]) // 2, 0, w - 1)
+        cy = np.clip((xyxy[:, 1] + xyxy[:, 3]) // 2, 0, h - 1)
+        return self.mask[cy, cx] > 0
+
+    def arrays(self, result, offset, conf=None, classes=None):
+        xyxy, confs, cls = result_arrays(result, conf, classes)
+        ox, oy = offset
+        xyxy = xyxy + np.array([ox, oy, ox, oy], np.int32)
+        keep = self.contains(xyxy)
+        return xyxy[keep], confs[keep], cls[keep]
+
+    def detect(self, model, frame, conf=None, classes=None, **kwargs):
+        """One model call on the zones' crop -> (xyxy, conf, cls) in frame coordinates."""
+        roi, offset = self.crop(frame)
+        return self.arrays(model(roi, verbose=False, **kwargs)[0], offset, conf, classes)
+
+    def draw(self, frame, color=(0, 255, 255)):
+        self._prepare(frame.shape)
+        cv2.polylines(frame, self.scaled, True, color, 2)
+        return frame